@@ -0,0 +1,43 @@
+"""
+    Time to load the image directories Game loads at startup: one file at a time (before
+    atlases), building the atlases from scratch (first run) and from the cached atlases.
+    Run from the repo root:  python benchmarks/asset_startup.py
+"""
+import shutil
+import timeit
+
+from common import init_display
+
+from scripts.atlas import ATLAS_PATH, image_names, load_atlas
+from scripts.utils import load_image
+
+# the directories Game.__init__ passes to load_images
+GAME_DIRECTORIES = ['tiles/decor', 'tiles/grass', 'tiles/large_decor', 'tiles/stone', 'clouds', 'entities/player/idle',
+                    'entities/player/run', 'entities/player/jump', 'entities/player/slide', 'entities/player/wall_slide',
+                    'particles/leaf', 'particles/particle']
+
+
+def load_files():
+    for path in GAME_DIRECTORIES:
+        [load_image(path + '/' + name) for name in image_names(path)]
+
+
+def load_atlases():
+    for path in GAME_DIRECTORIES:
+        load_atlas(path)
+
+
+def cold_atlases():
+    shutil.rmtree(ATLAS_PATH, ignore_errors=True)
+    load_atlases()
+
+
+def main():
+    init_display()
+    for label, func in (('one file at a time', load_files), ('atlas, cold cache', cold_atlases), ('atlas, warm cache', load_atlases)):
+        seconds = min(timeit.repeat(func, number=1, repeat=5))
+        print('%-20s %8.2f ms' % (label, seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+    Shared setup for the benchmark scripts: headless SDL drivers, repo imports,
+    a stand-in for Game that only holds assets, and seeded synthetic maps.
+"""
+import os
+import random
+import sys
+
+# SDL's dummy drivers let everything run on a machine without a display or sound card
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pygame
+
+from scripts.tilemap import Tilemap
+from scripts.utils import load_image, load_images, Animation
+
+
+# images are loaded relative to the repo root and convert() needs a display mode
+def init_display():
+    os.chdir(ROOT)
+    pygame.init()
+    pygame.display.set_mode((1, 1))
+
+
+# holds the same assets Game does, without opening a window or loading sounds
+class BenchGame:
+    def __init__(self):
+        self.assets = {
+            'decor': load_images('tiles/decor'),
+            'grass': load_images('tiles/grass'),
+            'large_decor': load_images('tiles/large_decor'),
+            'stone': load_images('tiles/stone'),
+            'spawners': load_images('tiles/spawners'),
+            'clouds': load_images('clouds'),
+            'enemy/idle': Animation(load_images('entities/enemy/idle'), 6),
+            'enemy/run': Animation(load_images('entities/enemy/run'), 4),
+            'player/idle': Animation(load_images('entities/player/idle'), 6),
+            'player/run': Animation(load_images('entities/player/run'), 4),
+            'player/jump': Animation(load_images('entities/player/jump')),
+            'player/slide': Animation(load_images('entities/player/slide')),
+            'player/wall_slide': Animation(load_images('entities/player/wall_slide')),
+            'particle/leaf': Animation(load_images('particles/leaf'), img_dur=20, loop=False),
+            'particle/particle': Animation(load_images('particles/particle'), img_dur=6, loop=False),
+            'gun': load_image('gun.png'),
+        }
+
+
+"""
+    returns a Tilemap of width x height tiles: a solid floor, random platforms and
+    some offgrid decor, always the same for the same seed
+"""
+def synthetic_tilemap(game, width, height, seed=0):
+    rng = random.Random(seed)
+    tilemap = Tilemap(game, 16)
+    for x in range(width):
+        for y in range(height - 3, height):
+            tilemap.set_tile((x, y), 'stone', 1)
+    for i in range(width * height // 40):
+        x = rng.randrange(width)
+        y = rng.randrange(height - 3)
+        tile_type = rng.choice(['grass', 'stone'])
+        for j in range(rng.randint(2, 8)):
+            tilemap.set_tile((x + j, y), tile_type, 1)
+    for i in range(width * height // 100):
+        tilemap.add_offgrid({'type': 'decor', 'variant': rng.randint(0, 3), 'pos': [rng.random() * width * 16, rng.random() * height * 16]})
+    return tilemap
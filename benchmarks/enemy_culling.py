@@ -0,0 +1,102 @@
+"""
+    Per-step cost of the enemies against how many a level has, stepping every enemy with its own
+    AI (how Enemy.update used to work) against EnemyGroup, which batches the AI and only steps
+    the enemies near the camera. Enemies are spread over a 1024 x 32 tile synthetic level and
+    the camera pans slowly along it.
+    Run from the repo root:  python benchmarks/enemy_culling.py [enemy counts...]
+"""
+import random
+import sys
+import timeit
+
+from common import BenchGame, init_display, synthetic_tilemap
+
+from scripts.enemies import EnemyGroup
+from scripts.entities import Enemy, PhysicsEntity
+from scripts.projectiles import ProjectilePool
+from scripts.spark import SparkSystem
+from scripts.spatial import SpatialGrid
+
+ENEMY_COUNTS = [10, 100, 500, 1000]
+LEVEL_SIZE = (1024, 32)
+STEPS = 120
+
+
+class Silent:
+    def play(self, loops=0):
+        pass
+
+
+# the Enemy.update from before EnemyGroup, AI and physics for one enemy at a time
+class PerEnemy(Enemy):
+    def __init__(self, game, pos, size):
+        super().__init__(game, pos, size)
+        self.walking = 0
+
+    def update(self, tilemap, movement=(0, 0)):
+        if self.walking:
+            if (not self.collisions['right'] and not self.collisions['left']
+                    and tilemap.solid_check((self.rect().centerx + (-7 if self.flip else 7), self.pos[1] + 23))):
+                movement = (movement[0] - 0.5 if self.flip else 0.5, movement[1])
+            else:
+                self.flip = not self.flip
+            self.walking = max(0, self.walking - 1)
+            if not self.walking:
+                self.shoot()
+        elif random.random() < 0.01:
+            self.walking = random.randint(30, 120)
+        super().update(tilemap, movement)
+
+
+def setup(count, enemy_class):
+    game = BenchGame()
+    game.sfx = {'shoot': Silent()}
+    game.projectiles = ProjectilePool()
+    game.sparks = SparkSystem()
+    # the whole synthetic map is loaded, nothing streams
+    game.streamer = None
+    game.entity_grid = SpatialGrid(32)
+    game.tilemap = synthetic_tilemap(game, LEVEL_SIZE[0], LEVEL_SIZE[1])
+    game.player = PhysicsEntity(game, 'player', (50, (LEVEL_SIZE[1] - 5) * 16), (8, 15))
+    game.player.sync_grid(game.entity_grid)
+    rng = random.Random(count)
+    enemies = [enemy_class(game, [rng.random() * LEVEL_SIZE[0] * 16, rng.random() * (LEVEL_SIZE[1] - 4) * 16], (8, 15)) for i in range(count)]
+    for enemy in enemies:
+        enemy.sync_grid(game.entity_grid)
+    return game, enemies
+
+
+# center of the camera on a step, panning a pixel per step along the floor
+def camera(step):
+    return (200 + step, (LEVEL_SIZE[1] - 8) * 16)
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or ENEMY_COUNTS
+    init_display()
+    print('%8s %17s %17s %8s %8s' % ('enemies', 'per enemy ms/step', 'grouped ms/step', 'speedup', 'awake'))
+    for count in counts:
+        game, enemies = setup(count, PerEnemy)
+
+        def per_enemy_step():
+            for enemy in enemies:
+                enemy.update(game.tilemap, (0, 0))
+            game.projectiles.clear()
+        naive = min(timeit.repeat(per_enemy_step, number=STEPS, repeat=3)) / STEPS
+
+        game, enemies = setup(count, Enemy)
+        group = EnemyGroup(game)
+        for enemy in enemies:
+            group.add(enemy)
+        steps = iter(range(10 ** 9))
+
+        def grouped_step():
+            group.update(game.tilemap, camera(next(steps)))
+            game.projectiles.clear()
+        grouped = min(timeit.repeat(grouped_step, number=STEPS, repeat=3)) / STEPS
+
+        print('%8d %17.3f %17.3f %7.1fx %8d' % (count, naive * 1000, grouped * 1000, naive / grouped, group.active[:group.count].sum()))
+
+
+if __name__ == '__main__':
+    main()
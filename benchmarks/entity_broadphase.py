@@ -0,0 +1,90 @@
+"""
+    Per-step cost of entity overlap queries with and without the SpatialGrid broadphase,
+    for 10, 100 and 1000 entities wandering over a 4096x1024 pixel level.
+    Every step each entity moves a little, then the dashing player looks for entities it
+    overlaps and every entity looks for others within 48 pixels (like pickups).
+    Run from the repo root:  python benchmarks/entity_broadphase.py [entity counts...]
+"""
+import random
+import sys
+import timeit
+
+import common  # puts the repo root on sys.path
+
+from scripts.spatial import SpatialGrid
+
+ENTITY_COUNTS = [10, 100, 1000]
+LEVEL_SIZE = (4096, 1024)
+ENTITY_SIZE = (8, 15)
+# the same cell size Game uses for its entity grid
+CELL_SIZE = 32
+RADIUS = 48
+STEPS = 60
+
+
+def wander(positions, rng):
+    for pos in positions:
+        pos[0] = min(LEVEL_SIZE[0], max(0, pos[0] + rng.uniform(-2, 2)))
+        pos[1] = min(LEVEL_SIZE[1], max(0, pos[1] + rng.uniform(-2, 2)))
+
+
+def overlaps(a, b):
+    return a[0] < b[0] + b[2] and b[0] < a[0] + a[2] and a[1] < b[1] + b[3] and b[1] < a[1] + a[3]
+
+
+# the old way: every entity checked against the player and every pair looked at
+def naive_step(positions, rng):
+    wander(positions, rng)
+    player = (positions[0][0], positions[0][1], ENTITY_SIZE[0], ENTITY_SIZE[1])
+    hits = [pos for pos in positions[1:] if overlaps((pos[0], pos[1], ENTITY_SIZE[0], ENTITY_SIZE[1]), player)]
+    near = 0
+    for pos in positions:
+        for other in positions:
+            dx = max(other[0] - pos[0], 0, pos[0] - other[0] - ENTITY_SIZE[0])
+            dy = max(other[1] - pos[1], 0, pos[1] - other[1] - ENTITY_SIZE[1])
+            if other is not pos and dx * dx + dy * dy <= RADIUS * RADIUS:
+                near += 1
+    return len(hits), near
+
+
+def grid_step(grid, handles, positions, rng):
+    wander(positions, rng)
+    for handle, pos in zip(handles, positions):
+        grid.move(handle, (pos[0], pos[1], ENTITY_SIZE[0], ENTITY_SIZE[1]))
+    hits = [handle for handle in grid.query_rect(grid.rect(handles[0])) if handle != handles[0]]
+    near = 0
+    for handle, pos in zip(handles, positions):
+        near += len(grid.query_radius(pos, RADIUS)) - 1
+    return len(hits), near
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or ENTITY_COUNTS
+    print('%9s %14s %14s %10s' % ('entities', 'naive ms/step', 'grid ms/step', 'speedup'))
+    for count in counts:
+        rng = random.Random(count)
+        start = [[rng.random() * LEVEL_SIZE[0], rng.random() * LEVEL_SIZE[1]] for i in range(count)]
+
+        positions = [list(pos) for pos in start]
+        naive_rng = random.Random(0)
+        # the all pairs loop gets slow at 1000, a few steps are enough there
+        steps = STEPS if count < 1000 else 3
+        naive = min(timeit.repeat(lambda: naive_step(positions, naive_rng), number=steps, repeat=3)) / steps
+
+        positions = [list(pos) for pos in start]
+        grid = SpatialGrid(CELL_SIZE)
+        handles = [grid.insert(i, (pos[0], pos[1], ENTITY_SIZE[0], ENTITY_SIZE[1])) for i, pos in enumerate(positions)]
+        grid_rng = random.Random(0)
+        fast = min(timeit.repeat(lambda: grid_step(grid, handles, positions, grid_rng), number=STEPS, repeat=3)) / STEPS
+
+        # both ways have to find the same entities
+        check = [list(pos) for pos in start]
+        check_grid = SpatialGrid(CELL_SIZE)
+        check_handles = [check_grid.insert(i, (pos[0], pos[1], ENTITY_SIZE[0], ENTITY_SIZE[1])) for i, pos in enumerate(check)]
+        same = naive_step([list(pos) for pos in check], random.Random(1)) == grid_step(check_grid, check_handles, check, random.Random(1))
+
+        print('%9d %14.3f %14.3f %9.1fx%s' % (count, naive * 1000, fast * 1000, naive / fast, '' if same else '  MISMATCH'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+    Checks that a steady fight allocates next to nothing per step. Enemies walk and shoot at a
+    player running along the floor of a synthetic level, and one is hit every half second for
+    its burst of sparks and particles. After a warm up that fills the pools, tracemalloc watches
+    STEPS more steps and reports the memory kept, the biggest transient allocation in a step,
+    the garbage collections that ran and whether any pool had to make new objects.
+    Run from the repo root:  python benchmarks/frame_allocations.py [enemy count]
+"""
+import gc
+import sys
+import tracemalloc
+
+from common import BenchGame, init_display, synthetic_tilemap
+
+from scripts.enemies import EnemyGroup
+from scripts.entities import Enemy, PhysicsEntity
+from scripts.particle import ParticleSystem
+from scripts.projectiles import ProjectilePool
+from scripts.spark import SparkSystem
+from scripts.spatial import SpatialGrid
+from scripts.utils import animation_clock
+
+LEVEL_SIZE = (64, 24)
+WARM_UP = 600
+STEPS = 3000
+# traced steps before the first snapshot, so objects that are only replaced (positions, timers) are traced on both ends
+TRACED_WARM_UP = 300
+# memory kept per step above which the steps count as growing, in bytes, what's kept without growing
+# (grid cells and sets entities moved into, floats that replaced untraced ones) spreads thinner the longer it runs
+KEPT_LIMIT = 4
+
+
+class Silent:
+    def play(self, loops=0):
+        pass
+
+
+def setup(count):
+    game = BenchGame()
+    game.sfx = {'shoot': Silent(), 'hit': Silent()}
+    game.screen_shake = 0
+    game.projectiles = ProjectilePool()
+    game.particles = ParticleSystem(game)
+    game.sparks = SparkSystem()
+    # the whole synthetic map is loaded, nothing streams
+    game.streamer = None
+    game.entity_grid = SpatialGrid(32)
+    game.tilemap = synthetic_tilemap(game, LEVEL_SIZE[0], LEVEL_SIZE[1])
+    floor = (LEVEL_SIZE[1] - 3) * 16 - 15
+    game.player = PhysicsEntity(game, 'player', (100, floor), (8, 15))
+    game.player.sync_grid(game.entity_grid)
+    game.enemies = EnemyGroup(game)
+    for i in range(count):
+        enemy = Enemy(game, (40 + i * 300 / count, floor), (8, 15))
+        enemy.sync_grid(game.entity_grid)
+        game.enemies.add(enemy)
+    game.player_speed = 1
+    return game
+
+
+def step(game, i):
+    animation_clock.advance()
+    player = game.player
+    # runs back and forth under the enemies
+    if player.pos[0] > 340 or player.pos[0] < 20:
+        game.player_speed = -game.player_speed
+    center = (player.pos[0], player.pos[1])
+    game.enemies.update(game.tilemap, center)
+    player.update(game.tilemap, (game.player_speed, 0))
+    player.sync_grid(game.entity_grid)
+    game.projectiles.update(game.tilemap, player.rect())
+    if i % 30 == 0:
+        game.enemies.enemies[i // 30 % len(game.enemies)].hit()
+    game.particles.update()
+    game.sparks.update()
+
+
+def pool_stats(game):
+    return {'projectiles': game.projectiles.pool.stats(),
+            'particles': game.particles.high_water, 'sparks': game.sparks.high_water}
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 12
+    init_display()
+    game = setup(count)
+    for i in range(WARM_UP):
+        step(game, i)
+    created = (game.projectiles.pool.created, len(game.particles.frame), len(game.sparks.speed))
+
+    gc.collect()
+    collections = sum(stat['collections'] for stat in gc.get_stats())
+    tracemalloc.start()
+    for i in range(WARM_UP, WARM_UP + TRACED_WARM_UP):
+        step(game, i)
+    start = tracemalloc.take_snapshot()
+    transient = 0
+    for i in range(WARM_UP + TRACED_WARM_UP, WARM_UP + TRACED_WARM_UP + STEPS):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        step(game, i)
+        transient = max(transient, tracemalloc.get_traced_memory()[1] - before)
+    end = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    collections = sum(stat['collections'] for stat in gc.get_stats()) - collections
+
+    kept = sum(stat.size_diff for stat in end.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).compare_to(start, 'filename'))
+    grown = created != (game.projectiles.pool.created, len(game.particles.frame), len(game.sparks.speed))
+    print('enemies                  %d' % count)
+    print('memory kept after %d    %d bytes, %.2f per step' % (STEPS, kept, kept / STEPS))
+    print('largest step transient   %d bytes' % transient)
+    print('gc collections           %d' % collections)
+    print('pools grew               %s' % ('yes' if grown else 'no'))
+    for name, stats in pool_stats(game).items():
+        print('%-24s %s' % (name, stats))
+    steady = kept / STEPS < KEPT_LIMIT and not grown
+    print('OK' if steady else 'ALLOCATING')
+    return 0 if steady else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
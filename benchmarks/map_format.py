@@ -0,0 +1,55 @@
+"""
+    Load time and file size of map.json against the binary map format (plain and zlib)
+    for maps of 10k, 100k and 1M grid tiles.
+    Run from the repo root:  python benchmarks/map_format.py [tile counts...]
+"""
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+import common  # puts the repo root on sys.path
+
+from scripts.mapfile import write_map
+from scripts.tilemap import Tilemap
+
+TILE_COUNTS = [10000, 100000, 1000000]
+
+
+# a square of count grid tiles with random types and variants, plus one offgrid tile per 100 grid tiles
+def build_map(count, seed=0):
+    rng = random.Random(seed)
+    tilemap = Tilemap(None, 16)
+    width = int(count ** 0.5)
+    for i in range(count):
+        tilemap.set_tile((i % width, i // width), rng.choice(['grass', 'stone', 'decor']), rng.randint(0, 8))
+    for i in range(count // 100):
+        tilemap.offgrid_tiles.insert({'type': 'large_decor', 'variant': 0, 'pos': [rng.random() * width * 16, rng.random() * width * 16]}, (0, 0, 16, 16))
+    return tilemap
+
+
+def load(path):
+    Tilemap(None, 16).load(path)
+
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or TILE_COUNTS
+    directory = tempfile.mkdtemp()
+    print('%9s %-12s %12s %12s' % ('tiles', 'format', 'size KiB', 'load ms'))
+    for count in counts:
+        tilemap = build_map(count)
+        files = [('json', os.path.join(directory, 'map.json')), ('tmap', os.path.join(directory, 'map.tmap')), ('tmap zlib', os.path.join(directory, 'map_z.tmap'))]
+        tilemap.save(files[0][1])
+        write_map(tilemap, files[1][1])
+        write_map(tilemap, files[2][1], compress=True)
+        for label, path in files:
+            # json gets slow enough at 1M tiles that fewer repeats are plenty
+            seconds = min(timeit.repeat(lambda: load(path), number=1, repeat=3 if count < 1000000 else 1))
+            print('%9d %-12s %12.1f %12.2f' % (count, label, os.path.getsize(path) / 1024, seconds * 1000))
+            os.remove(path)
+    os.rmdir(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+    Compares the bucketed offgrid_tiles index against scanning a plain list of offgrid tiles.
+    Run from the repo root:  python benchmarks/offgrid_index.py [tile count]
+"""
+import os
+import random
+import sys
+import timeit
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from scripts.tilemap import Tilemap
+
+TILE_SIZE = 16
+
+
+def synthetic_offgrid(count, seed=0):
+    rng = random.Random(seed)
+    return [{'type': 'decor', 'variant': rng.randint(0, 3), 'pos': [rng.random() * 8000, rng.random() * 8000]} for i in range(count)]
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    tiles = synthetic_offgrid(count)
+    rng = random.Random(1)
+    views = [(rng.random() * 7680, rng.random() * 7760, 320, 240) for i in range(500)]
+    points = [(rng.random() * 8000, rng.random() * 8000) for i in range(500)]
+
+    tilemap = Tilemap(None, TILE_SIZE)
+    for tile in tiles:
+        tilemap.add_offgrid(tile)
+
+    def scan_view(view):
+        view_rect = pygame.Rect(view)
+        return [tile for tile in tiles if view_rect.colliderect(pygame.Rect(tile['pos'][0], tile['pos'][1], TILE_SIZE, TILE_SIZE))]
+
+    def scan_point(point):
+        return [tile for tile in tiles if pygame.Rect(tile['pos'][0], tile['pos'][1], TILE_SIZE, TILE_SIZE).collidepoint(point)]
+
+    cases = [
+        ('view query (list scan)', lambda: [scan_view(view) for view in views], len(views)),
+        ('view query (index)', lambda: [tilemap.offgrid_tiles.query_rect(view) for view in views], len(views)),
+        ('point query (list scan)', lambda: [scan_point(point) for point in points], len(points)),
+        ('point query (index)', lambda: [tilemap.offgrid_at(point) for point in points], len(points)),
+    ]
+    print('%d offgrid tiles' % count)
+    for name, func, ops in cases:
+        seconds = min(timeit.repeat(func, number=1, repeat=3))
+        print('%-26s %12.0f ops/sec' % (name, ops / seconds))
+
+    seconds = timeit.timeit(lambda: tilemap.extract([('decor', 0), ('decor', 1)]), number=1)
+    print('%-26s %12.1f ms' % ('extract(keep=False)', seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
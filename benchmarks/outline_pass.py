@@ -0,0 +1,78 @@
+"""
+    Compares the cached-silhouette outline pass against masking the whole display every frame.
+    Prints the time per frame of both and the number of pixels that differ (should be 0).
+    Run from the repo root:  python benchmarks/outline_pass.py
+"""
+import timeit
+
+from common import BenchGame, init_display
+
+import pygame
+
+from scripts.outline import OutlineLayer, OUTLINE_OFFSETS
+from scripts.tilemap import Tilemap
+
+FRAMES = 120
+
+
+# scroll position and player sprite for every frame, the player runs across the map
+def scene(game):
+    frames = []
+    for i in range(FRAMES):
+        images = game.assets['player/run'].images
+        img = images[i // 4 % len(images)]
+        frames.append(((i * 2 - 40, -20 + i % 30), img, i % 60 >= 30, (150.5 + i % 7, 100 + i % 5)))
+    return frames
+
+
+def mask_pass(tilemap, frames, display, display_2):
+    for scroll, img, flip, pos in frames:
+        display.fill((0, 0, 0, 0))
+        display_2.fill((0, 0, 0, 0))
+        tilemap.render(display, offset=scroll)
+        display.blit(pygame.transform.flip(img, flip, False), pos)
+        display_mask = pygame.mask.from_surface(display)
+        display_sillhouette = display_mask.to_surface(setcolor=(0, 0, 0, 180), unsetcolor=(0, 0, 0, 0))
+        for offset in OUTLINE_OFFSETS:
+            display_2.blit(display_sillhouette, offset)
+        yield display_2
+
+
+def cached_pass(tilemap, frames, display, display_2, outline):
+    for scroll, img, flip, pos in frames:
+        display.fill((0, 0, 0, 0))
+        display_2.fill((0, 0, 0, 0))
+        outline.clear()
+        tilemap.render(display, offset=scroll, outline=outline)
+        display.blit(pygame.transform.flip(img, flip, False), pos)
+        outline.add(img, pos, flip)
+        outline.render(display_2)
+        yield display_2
+
+
+def main():
+    init_display()
+    game = BenchGame()
+    tilemap = Tilemap(game, 16)
+    tilemap.load('map.json')
+    frames = scene(game)
+    size = (320, 240)
+    display = pygame.Surface(size, pygame.SRCALPHA)
+    display_2 = pygame.Surface(size, pygame.SRCALPHA)
+    outline = OutlineLayer(size)
+
+    different = 0
+    expected = [pygame.image.tobytes(surf, 'RGBA') for surf in mask_pass(tilemap, frames, display, display_2)]
+    for before, surf in zip(expected, cached_pass(tilemap, frames, display, display_2, outline)):
+        after = pygame.image.tobytes(surf, 'RGBA')
+        different += sum(before[i:i + 4] != after[i:i + 4] for i in range(0, len(before), 4))
+    print('pixels that differ over %d frames: %d' % (FRAMES, different))
+
+    for label, func in (('full display mask', lambda: list(mask_pass(tilemap, frames, display, display_2))),
+                        ('cached silhouettes', lambda: list(cached_pass(tilemap, frames, display, display_2, outline)))):
+        seconds = min(timeit.repeat(func, number=1, repeat=5))
+        print('%-20s %8.1f us/frame' % (label, seconds / FRAMES * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+    Pans a camera across a large synthetic map streamed from regions and reports how long
+    RegionStreamer.update takes per frame, how much tile data stays loaded, and whether
+    solid_check / physics_rects_around inside the loaded regions match the fully loaded map.
+    Run from the repo root:  python benchmarks/region_streaming.py [map width] [map height]
+"""
+import shutil
+import sys
+import tempfile
+import time
+
+from common import BenchGame, init_display, synthetic_tilemap
+
+from scripts.streaming import RegionStreamer, write_regions
+from scripts.tilemap import Tilemap
+
+VIEW = (320, 240)
+# small enough that regions get dropped while panning across the default map
+BUDGET = 256 * 1024
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 4096
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    init_display()
+    game = BenchGame()
+    full = synthetic_tilemap(game, width, height)
+    directory = tempfile.mkdtemp()
+    print('%d tiles, %d regions' % (full.tile_count(), write_regions(full, directory)))
+
+    streamed = Tilemap(game, 16)
+    streamer = RegionStreamer(streamed, directory, budget=BUDGET)
+    y = (height - 20) * 16
+    streamer.require((0, y, VIEW[0], VIEW[1]))
+
+    timings = []
+    mismatches = checks = 0
+    peak_bytes = 0
+    # 4 pixels per frame, a fast run
+    for x in range(0, width * 16 - VIEW[0], 4):
+        view = (x, y, VIEW[0], VIEW[1])
+        start = time.perf_counter()
+        streamer.update(view)
+        timings.append(time.perf_counter() - start)
+        peak_bytes = max(peak_bytes, streamer.loaded_bytes)
+        for pos in ((x + VIEW[0] / 2, y + VIEW[1] - 8), (x + 10, y + 100), (x + VIEW[0] - 10, y + 200)):
+            if streamer.is_loaded(pos):
+                checks += 1
+                if bool(streamed.solid_check(pos)) != bool(full.solid_check(pos)) or streamed.physics_rects_around(pos) != full.physics_rects_around(pos):
+                    mismatches += 1
+    # let the loading thread finish before the files are removed
+    streamer.pool.shutdown(wait=True)
+    shutil.rmtree(directory)
+
+    timings.sort()
+    print('frames                 %d' % len(timings))
+    print('update p50 / p99 / max %.3f / %.3f / %.3f ms' % (timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.99)] * 1000, timings[-1] * 1000))
+    print('peak loaded tile data  %.1f KiB (budget %.1f KiB)' % (peak_bytes / 1024, BUDGET / 1024))
+    print('regions loaded at end  %d' % streamer.loaded_count())
+    print('physics checks         %d, mismatches %d' % (checks, mismatches))
+
+
+if __name__ == '__main__':
+    main()
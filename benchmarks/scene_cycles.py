@@ -0,0 +1,120 @@
+"""
+    Pauses and resumes gameplay over and over through the real Game scenes, headless, and checks
+    that memory and the scene stack stay flat. Every cycle posts escape (PlayScene pushes a
+    PauseScene) and then a click on continue (the PauseScene pops), running one frame of each.
+    The repo doesn't ship every file the game loads (see STAND_INS). When some are missing the game
+    is run from a temporary copy of the repo with stand-ins for them, as it has to be to start at all.
+    Run from the repo root:  python benchmarks/scene_cycles.py [cycles]
+"""
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import tracemalloc
+
+from common import ROOT
+
+import pygame
+
+CYCLES = 10000
+WARM_UP = 200
+# memory that may be kept over all the cycles without it counting as growth, in bytes
+GROWTH_LIMIT = 64 * 1024
+
+
+# files Game loads that may be missing from the repo -> a file of the same kind used in their place
+STAND_INS = {
+    os.path.join('data', 'images', 'buttons', 'controls_btn.png'): os.path.join('data', 'images', 'buttons', 'start_btn.png'),
+    os.path.join('data', 'music.wav'): os.path.join('data', 'sfx', 'hit.wav'),
+}
+
+
+"""
+    returns (directory to run the game from, temporary directory to remove afterwards or None):
+    the repo root when nothing is missing, otherwise a copy of it with the missing files stood in for.
+    Returns (None, None) when even a stand-in is missing.
+"""
+def game_root():
+    missing = [path for path in STAND_INS if not os.path.exists(os.path.join(ROOT, path))]
+    if not missing:
+        return ROOT, None
+    if not all(os.path.exists(os.path.join(ROOT, STAND_INS[path])) for path in missing):
+        return None, None
+    temp = tempfile.mkdtemp(prefix='scene_cycles')
+    root = os.path.join(temp, 'game')
+    shutil.copytree(ROOT, root, ignore=shutil.ignore_patterns('.git', '__pycache__'))
+    for path in missing:
+        print('missing %s, using %s in a copy of the repo' % (path, STAND_INS[path]))
+        shutil.copy(os.path.join(root, STAND_INS[path]), os.path.join(root, path))
+    return root, temp
+
+
+# stands in for pygame's Clock so frames run back to back instead of at 60 a second
+class NoWait:
+    def tick(self, framerate=0):
+        return 0
+
+    def get_fps(self):
+        return 0
+
+
+# returns the number of scenes while paused, 2 when the pause menu went on top of gameplay
+def cycle(game):
+    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_ESCAPE, mod=0, unicode='', scancode=0))
+    game.scenes.top().frame()
+    paused = len(game.scenes)
+    pygame.event.post(pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=game.continue_button.rect.center, button=1))
+    game.scenes.top().frame()
+    return paused
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else CYCLES
+    root, temp = game_root()
+    if root is None:
+        print('SKIPPED: files the game loads are missing and there is nothing to stand in for them')
+        return 0
+    try:
+        return run(cycles, root)
+    finally:
+        if temp:
+            shutil.rmtree(temp, ignore_errors=True)
+
+
+def run(cycles, root):
+    # Game loads everything relative to the directory it runs in
+    os.chdir(root)
+    from game import Game, PlayScene
+
+    game = Game()
+    game.clock = NoWait()
+    game.max_fps = 0
+    game.scenes.push(PlayScene(game))
+    for i in range(WARM_UP):
+        cycle(game)
+
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    print('%8s %14s %8s' % ('cycles', 'memory kept', 'scenes'))
+    # scene stack sizes seen while paused and after resuming
+    paused = set()
+    resumed = set()
+    for i in range(1, cycles + 1):
+        paused.add(cycle(game))
+        resumed.add(len(game.scenes))
+        if i % (cycles // 10 or 1) == 0:
+            gc.collect()
+            print('%8d %12d B %8d' % (i, tracemalloc.get_traced_memory()[0] - start, len(game.scenes)))
+    gc.collect()
+    growth = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+
+    flat = growth < GROWTH_LIMIT and paused == {2} and resumed == {1} and isinstance(game.scenes.top(), PlayScene)
+    print('OK' if flat else 'GROWING')
+    return 0 if flat else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
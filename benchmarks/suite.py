@@ -0,0 +1,243 @@
+"""
+    Headless micro-benchmarks for the hot paths in the scripts package.
+
+    python benchmarks/suite.py                             runs everything and prints JSON
+    python benchmarks/suite.py -o baseline.json            also saves the results
+    python benchmarks/suite.py --compare baseline.json     flags benchmarks whose p50 got slower
+                                                           than the baseline by more than --threshold
+    python benchmarks/suite.py --size 512 128 -k tilemap   bigger synthetic map, only tilemap benchmarks
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import sys
+import time
+
+from common import BenchGame, init_display, synthetic_tilemap
+
+import pygame
+
+from scripts.clouds import Clouds
+from scripts.entities import PhysicsEntity
+from scripts.particle import ParticleSystem
+from scripts.spark import SparkSystem
+
+# name -> (setup function, number of timed calls)
+BENCHMARKS = {}
+
+
+"""
+    registers a benchmark, the decorated function gets the shared context and
+    returns the function that is timed (called with no arguments)
+"""
+def benchmark(name, samples=2000):
+    def register(setup):
+        BENCHMARKS[name] = (setup, samples)
+        return setup
+    return register
+
+
+class Context:
+    def __init__(self, game, width, height, seed):
+        self.game = game
+        self.width = width
+        self.height = height
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.tilemap = synthetic_tilemap(game, width, height, seed)
+        self.surf = pygame.Surface((320, 240), pygame.SRCALPHA)
+
+    # random pixel positions inside the map, cycled through by the lookup benchmarks
+    def positions(self, count=1024):
+        return [(self.rng.random() * self.width * 16, self.rng.random() * self.height * 16) for i in range(count)]
+
+    # random camera offsets that keep the view inside the map
+    def offsets(self, count=256):
+        return [(self.rng.randint(0, max(0, self.width * 16 - 320)), self.rng.randint(0, max(0, self.height * 16 - 240))) for i in range(count)]
+
+
+def cycle(func, args):
+    state = [0]
+
+    def call():
+        state[0] = (state[0] + 1) % len(args)
+        return func(args[state[0]])
+    return call
+
+
+@benchmark('tilemap.tiles_around', samples=20000)
+def bench_tiles_around(ctx):
+    return cycle(ctx.tilemap.tiles_around, ctx.positions())
+
+
+@benchmark('tilemap.physics_rects_around', samples=20000)
+def bench_physics_rects_around(ctx):
+    return cycle(ctx.tilemap.physics_rects_around, ctx.positions())
+
+
+@benchmark('tilemap.solid_check', samples=20000)
+def bench_solid_check(ctx):
+    return cycle(ctx.tilemap.solid_check, ctx.positions())
+
+
+@benchmark('tilemap.render', samples=2000)
+def bench_tilemap_render(ctx):
+    return cycle(lambda offset: ctx.tilemap.render(ctx.surf, offset=offset), ctx.offsets())
+
+
+@benchmark('tilemap.autotile', samples=20)
+def bench_autotile(ctx):
+    return ctx.tilemap.autotile
+
+
+@benchmark('tilemap.autotile_around', samples=20000)
+def bench_autotile_around(ctx):
+    # what the editor does after every placed tile
+    return cycle(lambda pos: ctx.tilemap.autotile_around((pos[0] // 16, pos[1] // 16)), ctx.positions())
+
+
+@benchmark('entity.update', samples=5000)
+def bench_entity_update(ctx):
+    entity = PhysicsEntity(ctx.game, 'player', (ctx.width * 8, 0), (8, 15))
+    state = [0]
+
+    def step():
+        state[0] += 1
+        # walks back and forth, starting over from the top if it ever leaves the map
+        entity.update(ctx.tilemap, (1 if state[0] // 120 % 2 else -1, 0))
+        if not 0 <= entity.pos[1] < ctx.height * 16:
+            entity.pos = [ctx.width * 8, 0]
+            entity.velocity = [0, 0]
+    return step
+
+
+@benchmark('animation.img_at', samples=20000)
+def bench_animation_img_at(ctx):
+    animation = ctx.game.assets['player/idle']
+    state = [0]
+
+    def step():
+        state[0] += 1
+        return animation.img_at(state[0])
+    return step
+
+
+@benchmark('particles.update_render', samples=2000)
+def bench_particles(ctx):
+    particles = ParticleSystem(ctx.game)
+
+    def step():
+        # one burst per frame keeps a few hundred particles alive
+        velocities = [(ctx.rng.random() - 0.5, ctx.rng.random() - 0.5) for i in range(20)]
+        particles.burst('particle', (160, 120), velocities, [ctx.rng.randint(0, 7) for i in range(20)])
+        particles.update()
+        particles.render(ctx.surf)
+    return step
+
+
+@benchmark('sparks.update_render', samples=2000)
+def bench_sparks(ctx):
+    sparks = SparkSystem()
+
+    def step():
+        sparks.burst((160, 120), [ctx.rng.random() * math.pi * 2 for i in range(10)], [2 + ctx.rng.random() for i in range(10)])
+        sparks.update()
+        sparks.render(ctx.surf)
+    return step
+
+
+@benchmark('clouds.render', samples=5000)
+def bench_clouds(ctx):
+    clouds = Clouds(ctx.game.assets['clouds'], count=16)
+    return cycle(lambda offset: clouds.render(ctx.surf, offset), ctx.offsets())
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+"""
+    times every call of func separately and returns ops/sec and p50/p99 in microseconds
+"""
+def measure(func, samples, warmup=None):
+    for i in range(warmup if warmup is not None else max(1, samples // 10)):
+        func()
+    timings = []
+    clock = time.perf_counter
+    for i in range(samples):
+        start = clock()
+        func()
+        timings.append(clock() - start)
+    total = sum(timings)
+    timings.sort()
+    return {
+        'samples': samples,
+        'ops_per_sec': samples / total if total else float('inf'),
+        'p50_us': percentile(timings, 0.5) * 1e6,
+        'p99_us': percentile(timings, 0.99) * 1e6,
+    }
+
+
+def run(names, width, height, seed, scale):
+    init_display()
+    game = BenchGame()
+    results = {}
+    for name in names:
+        setup, samples = BENCHMARKS[name]
+        # every benchmark starts from the same random state so runs can be compared
+        random.seed(seed)
+        ctx = Context(game, width, height, seed)
+        results[name] = measure(setup(ctx), max(1, int(samples * scale)))
+    return results
+
+
+# returns the names of the benchmarks whose p50 is slower than the baseline by more than threshold
+def regressions(results, baseline, threshold):
+    slower = []
+    for name, result in results.items():
+        if name in baseline and result['p50_us'] > baseline[name]['p50_us'] * (1 + threshold):
+            slower.append(name)
+    return slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-k', '--filter', default='', help='only run benchmarks whose name contains this')
+    parser.add_argument('--size', nargs=2, type=int, default=(256, 64), metavar=('WIDTH', 'HEIGHT'), help='synthetic map size in tiles')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, default=1.0, help='multiplies the number of timed calls')
+    parser.add_argument('-o', '--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.15, help='allowed p50 slowdown before a regression is flagged')
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    report = {
+        'meta': {'python': platform.python_version(), 'pygame': pygame.version.ver, 'size': list(args.size), 'seed': args.seed},
+        'results': run(names, args.size[0], args.size[1], args.seed, args.scale),
+    }
+
+    status = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        slower = regressions(report['results'], baseline, args.threshold)
+        for name in report['results']:
+            if name in baseline:
+                report['results'][name]['baseline_p50_us'] = baseline[name]['p50_us']
+                report['results'][name]['regression'] = name in slower
+        for name in slower:
+            print('REGRESSION %s: p50 %.2f us -> %.2f us' % (name, baseline[name]['p50_us'], report['results'][name]['p50_us']), file=sys.stderr)
+        status = 1 if slower else 0
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
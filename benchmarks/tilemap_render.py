@@ -0,0 +1,36 @@
+"""
+    Measures Tilemap.render with the chunk surface cache at increasing tile densities.
+    Run from the repo root:  python benchmarks/tilemap_render.py
+"""
+import random
+import timeit
+
+from common import BenchGame, init_display
+
+import pygame
+
+from scripts.tilemap import Tilemap
+
+
+def main():
+    init_display()
+    game = BenchGame()
+    surf = pygame.Surface((320, 240), pygame.SRCALPHA)
+    rng = random.Random(0)
+
+    for density in (0.1, 0.25, 0.5, 1.0):
+        tilemap = Tilemap(game, 16)
+        for x in range(-20, 60):
+            for y in range(-20, 60):
+                if rng.random() < density:
+                    tilemap.set_tile((x, y), rng.choice(['grass', 'stone', 'decor']), rng.randint(0, 3))
+        offsets = [(rng.randint(-200, 500), rng.randint(-200, 500)) for i in range(200)]
+        # first pass renders the chunk surfaces, the timed passes only blit them
+        for offset in offsets:
+            tilemap.render(surf, offset)
+        seconds = min(timeit.repeat(lambda: [tilemap.render(surf, offset) for offset in offsets], number=1, repeat=5))
+        print('density %4.2f  %6d tiles  %8.1f us/frame' % (density, tilemap.tile_count(), seconds / len(offsets) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+    Compares the chunked Tilemap storage against the old "x;y" string keyed dict.
+    The dict hands back the tile dicts it stores, the chunked tiles_around returns (x, y, type, variant)
+    tuples and solid_check builds a dict only for a solid tile, so the results are the same tiles.
+    Run from the repo root:  python benchmarks/tilemap_storage.py [map width] [map height]
+"""
+import os
+import random
+import sys
+import timeit
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+
+from scripts.tilemap import Tilemap, NEIGHBOR_OFFSETS, PHYSICS_TILES
+
+TILE_SIZE = 16
+
+
+# the tile storage Tilemap used before chunks, kept here so both can be measured side by side
+class DictTilemap:
+    def __init__(self, tile_size=16):
+        self.tile_size = tile_size
+        self.tilemap = {}
+
+    def tiles_around(self, pos):
+        tiles = []
+        tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        for offset in NEIGHBOR_OFFSETS:
+            check_loc = str(tile_loc[0] + offset[0]) + ';' + str(tile_loc[1] + offset[1])
+            if check_loc in self.tilemap:
+                tiles.append(self.tilemap[check_loc])
+        return tiles
+
+    def solid_check(self, pos):
+        tile_loc = str(int(pos[0] // self.tile_size)) + ';' + str(int(pos[1] // self.tile_size))
+        if tile_loc in self.tilemap:
+            if self.tilemap[tile_loc]['type'] in PHYSICS_TILES:
+                return self.tilemap[tile_loc]
+
+    def physics_rects_around(self, pos):
+        rects = []
+        for tile in self.tiles_around(pos):
+            if tile['type'] in PHYSICS_TILES:
+                rects.append(pygame.Rect(tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size, self.tile_size, self.tile_size))
+        return rects
+
+
+# fills roughly half of a width x height area with grass/stone/decor tiles
+def synthetic_tiles(width, height, seed=0):
+    rng = random.Random(seed)
+    tiles = []
+    for x in range(width):
+        for y in range(height):
+            if rng.random() < 0.5:
+                tiles.append((x, y, rng.choice(['grass', 'stone', 'decor']), rng.randint(0, 8)))
+    return tiles
+
+
+def build_dict(tiles):
+    tilemap = DictTilemap(TILE_SIZE)
+    for x, y, tile_type, variant in tiles:
+        tilemap.tilemap[str(x) + ';' + str(y)] = {'type': tile_type, 'variant': variant, 'pos': [x, y]}
+    return tilemap
+
+
+def build_chunked(tiles):
+    tilemap = Tilemap(None, TILE_SIZE)
+    for x, y, tile_type, variant in tiles:
+        tilemap.set_tile((x, y), tile_type, variant)
+    return tilemap
+
+
+def measure_memory(build, tiles):
+    tracemalloc.start()
+    tilemap = build(tiles)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return tilemap, size
+
+
+def measure_lookups(tilemap, positions, number=5):
+    results = {}
+    for name in ('tiles_around', 'solid_check', 'physics_rects_around'):
+        func = getattr(tilemap, name)
+        seconds = min(timeit.repeat(lambda: [func(pos) for pos in positions], number=1, repeat=number))
+        results[name] = len(positions) / seconds
+    return results
+
+
+def main():
+    width = int(sys.argv[1]) if len(sys.argv) > 1 else 256
+    height = int(sys.argv[2]) if len(sys.argv) > 2 else 256
+    tiles = synthetic_tiles(width, height)
+    rng = random.Random(1)
+    positions = [(rng.random() * width * TILE_SIZE, rng.random() * height * TILE_SIZE) for i in range(20000)]
+
+    print('%d tiles in a %dx%d area' % (len(tiles), width, height))
+    for label, build in (('dict', build_dict), ('chunked', build_chunked)):
+        tilemap, size = measure_memory(build, tiles)
+        print('%-8s memory: %8.1f KiB (%.1f bytes/tile)' % (label, size / 1024, size / max(1, len(tiles))))
+        for name, ops in measure_lookups(tilemap, positions).items():
+            print('%-8s %-22s %12.0f ops/sec' % (label, name, ops))
+
+
+if __name__ == '__main__':
+    main()
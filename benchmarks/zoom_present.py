@@ -0,0 +1,49 @@
+"""
+    Cost of getting the 320 x 240 display onto the 640 x 480 window at each zoom level, scaling
+    the whole display to a new surface every frame (how Game.render used to do it) against
+    Presenter, which scales only the visible part into surfaces it keeps. Shows how many window
+    pixels each way scales per frame and which path Presenter took.
+    Run from the repo root:  python benchmarks/zoom_present.py [nearest|smooth] [zoom levels...]
+"""
+import sys
+import timeit
+
+from common import init_display
+
+import pygame
+
+from scripts.present import FILTERS, Presenter
+
+ZOOM_LEVELS = [1, 1.25, 1.5, 2, 2.5, 3, 4]
+FRAMES = 200
+
+
+def main():
+    filter = sys.argv[1] if len(sys.argv) > 1 and sys.argv[1] in FILTERS else 'nearest'
+    zooms = [float(arg) for arg in sys.argv[1:] if arg not in FILTERS] or ZOOM_LEVELS
+    init_display()
+    screen = pygame.Surface((640, 480))
+    display = pygame.Surface((320, 240), pygame.SRCALPHA)
+    display.blit(pygame.image.load('data/images/background.png'), (0, 0))
+    presenter = Presenter(screen, filter, opaque=True)
+    scale = FILTERS[filter]
+
+    print('filter: ' + filter)
+    print('%6s %14s %14s %8s %13s %13s %8s' % ('zoom', 'full ms/frame', 'sub ms/frame', 'speedup', 'full pixels', 'sub pixels', 'path'))
+    for zoom in zooms:
+        def full_frame():
+            scaled = scale(display, (int(640 * zoom), int(480 * zoom)))
+            screen.blit(scaled, scaled.get_rect(center=(320, 240)))
+        full = min(timeit.repeat(full_frame, number=FRAMES, repeat=3)) / FRAMES
+
+        def presented_frame():
+            presenter.present(display, zoom)
+        presented = min(timeit.repeat(presented_frame, number=FRAMES, repeat=3)) / FRAMES
+
+        path = 'direct' if presenter.dest_pos is None else 'buffer'
+        print('%6.2f %14.3f %14.3f %7.1fx %13d %13d %8s' % (zoom, full * 1000, presented * 1000, full / presented,
+                                                           int(640 * zoom) * int(480 * zoom), presenter.pixels, path))
+
+
+if __name__ == '__main__':
+    main()
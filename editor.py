@@ -1,7 +1,9 @@
 import sys
 import pygame
-from scripts.tilemap import Tilemap
+from scripts.tilemap import Tilemap, AUTOTILE_TYPES
 from scripts.utils import load_images, Animation
+from scripts.surface_cache import transform_cache
+from scripts.present import Presenter
 
 #2;35;00
 
@@ -17,6 +19,8 @@ class Editor:
 
         # concept: render onto display then scale up to screen?
         self.display = pygame.Surface((320, 240))
+        # scales display up to the screen each frame without making a new surface
+        self.presenter = Presenter(self.screen, opaque=True)
 
         self.clock = pygame.time.Clock()
 
@@ -60,8 +64,8 @@ class Editor:
 
             self.tilemap.render(self.display, render_scroll)
 
-            current_tile_img = self.assets[self.tile_list[self.tile_group]][self.tile_variant].copy()
-            current_tile_img.set_alpha(100)  # adds transparency
+            # adds transparency, the see-through copy is cached instead of being made every frame
+            current_tile_img = transform_cache.alpha(self.assets[self.tile_list[self.tile_group]][self.tile_variant], 100)
 
             mpos = pygame.mouse.get_pos()  # gets current position of mouse
             mpos = (mpos[0] / RENDER_SCALE, mpos[1] / RENDER_SCALE)
@@ -77,17 +81,19 @@ class Editor:
 
             if self.clicking:  # changes value in tile map dictionary at current position
                 if self.ongrid:
-                    self.tilemap.tilemap[str(tile_pos[0]) + ';' + str(tile_pos[1])] = {
-                        'type': self.tile_list[self.tile_group], 'variant': self.tile_variant, 'pos': tile_pos}
+                    tile_type = self.tile_list[self.tile_group]
+                    tile = self.tilemap.get_tile(tile_pos)
+                    # an autotiled tile already has the variant its neighbours call for, placing it again would undo that
+                    if not (tile and tile['type'] == tile_type and tile_type in AUTOTILE_TYPES):
+                        if self.tilemap.set_tile(tile_pos, tile_type, self.tile_variant):
+                            # only the placed tile and its 4 neighbours can need a different variant
+                            self.tilemap.autotile_around(tile_pos)
             if self.right_clicking:
-                tile_location = str(tile_pos[0]) + ';' + str(tile_pos[1])
-                if tile_location in self.tilemap.tilemap:
-                    del self.tilemap.tilemap[tile_location]
-                for tile in self.tilemap.offgrid_tiles.copy():
-                    tile_img = self.assets[tile['type']][tile['variant']]
-                    tile_r = pygame.Rect(tile['pos'][0] - self.scroll[0], tile['pos'][1] - self.scroll[1], tile_img.get_width(), tile_img.get_height())
-                    if tile_r.collidepoint(mpos):
-                        self.tilemap.offgrid_tiles.remove(tile)
+                if self.tilemap.remove_tile(tile_pos):
+                    self.tilemap.autotile_around(tile_pos)
+                # only the offgrid tiles bucketed under the mouse are checked
+                for handle in self.tilemap.offgrid_at((mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])):
+                    self.tilemap.remove_offgrid(handle)
 
 
             self.display.blit(current_tile_img, (5, 5))
@@ -101,8 +107,8 @@ class Editor:
                         self.clicking = True
                         if not self.ongrid:
                             # keep in mind scroll variable is used to account for the camera
-                            self.tilemap.offgrid_tiles.append({'type': self.tile_list[self.tile_group],
-                                                               'variant': self.tile_variant, 'pos': (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])})
+                            self.tilemap.add_offgrid({'type': self.tile_list[self.tile_group],
+                                                      'variant': self.tile_variant, 'pos': (mpos[0] + self.scroll[0], mpos[1] + self.scroll[1])})
                     if event.button == 3:  # right click
                         self.right_clicking = True
                     if self.shift:
@@ -160,7 +166,7 @@ class Editor:
                     if event.key == pygame.K_RSHIFT:
                         self.shift = False
 
-            self.screen.blit(pygame.transform.scale(self.display, self.screen.get_size()), (0, 0))
+            self.presenter.present(self.display)
             pygame.display.update()
             self.clock.tick(60)
 
@@ -1,22 +1,45 @@
-import math
 import os
-import random
-import sys
+import time
 import pygame
 
 from scripts.buttons import Button
-from scripts.entities import PhysicsEntity, Player, Enemy
-from scripts.particle import Particle
-from scripts.spark import Spark
+from scripts.ui import Panel, wait_events
+from scripts.scenes import Scene, SceneStack
+from scripts.entities import Player, Enemy
+from scripts.enemies import EnemyGroup
+from scripts.particle import ParticleSystem
+from scripts.spark import SparkSystem
+from scripts.projectiles import ProjectilePool
 from scripts.tilemap import Tilemap
-from scripts.utils import load_image, load_images, Animation
+from scripts.streaming import RegionStreamer
+from scripts.spatial import SpatialGrid
 from scripts.clouds import Clouds
+from scripts.outline import OutlineLayer
+from scripts.profiler import FrameProfiler
+from scripts.assets import AssetManager, Assets
+from scripts.utils import load_image, animation_clock
+from scripts.dirty import DirtyRects
+from scripts.present import Presenter
 
 
 # 5:05:17
 
+# the simulation runs at a fixed 60 steps per second, physics values are tuned per step
+SIM_STEP = 1 / 60
+# most steps run for a single rendered frame, keeps a slow frame from snowballing into slower ones
+MAX_CATCH_UP_STEPS = 5
+# cell size of the grid entities are bucketed into for overlap queries, about two entities wide
+ENTITY_CELL_SIZE = 32
+# pixels around an entity's rect that its sprite, gun and outline can reach, for dirty rects
+ENTITY_DRAW_MARGIN = 16
+# how display_2 is scaled up to the window, a name from scripts.present.FILTERS ('nearest' keeps the pixels sharp)
+PRESENT_FILTER = 'nearest'
+
 class Game:
     def __init__(self):
+        # used to report how long it takes until the first menu frame is on screen
+        self.start_time = time.perf_counter()
+        self.first_frame_shown = False
         # pygame.mixer.pre_init(buffer=20000, frequency=22050)
         pygame.init()
 
@@ -30,35 +53,23 @@ class Game:
         self.internal_surface_size = (320, 240)
         self.display = pygame.Surface(self.internal_surface_size, pygame.SRCALPHA)
         self.display_2 = pygame.Surface(self.internal_surface_size, pygame.SRCALPHA)
+        # silhouettes of everything drawn on display, used to outline it on display_2
+        self.outline = OutlineLayer(self.internal_surface_size)
         self.display_2_rect = self.display_2.get_rect(center=(self.half_w, self.half_h))
-        self.internal_surface_size_vector = pygame.math.Vector2((640, 480))
         self.internal_offset = pygame.math.Vector2()
         self.internal_offset.x = self.internal_surface_size[0] // 2 - self.half_w
         self.internal_offset.y = self.internal_surface_size[1] // 2 - self.half_h
 
         self.clock = pygame.time.Clock()
+        # frame rate cap for rendering, 0 draws as fast as possible (the simulation stays at 60 steps a second)
+        self.max_fps = 60
+        # F3 toggles the per phase timing overlay, F4 writes the recorded frames to profile.csv
+        self.profiler = FrameProfiler()
 
         self.movement = [False, False]
 
-        self.assets = {
-            'decor': load_images('tiles/decor'),
-            'grass': load_images('tiles/grass'),
-            'large_decor': load_images('tiles/large_decor'),
-            'stone': load_images('tiles/stone'),
-            'player': load_image('entities/player.png'),
-            'background': load_image('background.png'),
-            'clouds': load_images('clouds'),
-            # 'enemy/idle': Animation(load_images('entities/enemy/idle'), 6),
-            # 'enemy/run': Animation(load_images('entities/enemy/run'), 4),
-            'player/idle': Animation(load_images('entities/player/idle'), 6),
-            'player/run': Animation(load_images('entities/player/run'), 4),
-            'player/jump': Animation(load_images('entities/player/jump')),
-            'player/slide': Animation(load_images('entities/player/slide')),
-            'player/wall_slide': Animation(load_images('entities/player/wall_slide')),
-            'particle/leaf': Animation(load_images('particles/leaf'), img_dur=20, loop=False),
-            'particle/particle': Animation(load_images('particles/particle'), img_dur=6, loop=False),
-            'gun': load_image('gun.png'),
-            'projectile': load_image('projectile.png'),
+        # the title screen's assets are loaded straight away, they are needed for the first frame anyway
+        self.assets = Assets({
             # added buttons for main menu
             'exit': load_image('buttons/exit_btn.png'),
             'start': load_image('buttons/start_btn.png'),
@@ -68,37 +79,20 @@ class Game:
             'main_menu_btn': load_image('buttons/main_menu_btn.png'),
             'title': load_image('title.png'),
             'controls_bg': load_image('controls_background.png'),
-        }
-
-        self.sfx = {
-            'jump': pygame.mixer.Sound('data/sfx/jump.wav'),
-            'dash': pygame.mixer.Sound('data/sfx/dash.wav'),
-            'hit': pygame.mixer.Sound('data/sfx/hit.wav'),
-            'shoot': pygame.mixer.Sound('data/sfx/shoot.wav'),
-            # 'ambience': pygame.mixer.Sound('data/sfx/ambience.wav'),
-        }
-
-        # self.sfx['ambience'].set_volume(0.2)
-        self.sfx['shoot'].set_volume(0.4)
-        self.sfx['hit'].set_volume(0.8)
-        self.sfx['dash'].set_volume(0.3)
-        self.sfx['jump'].set_volume(0.7)
-
-        self.clouds = Clouds(self.assets['clouds'], count=16)
-
-        # instantiates player
-        # size indicates the actual pixel width and length of the character
-
-        self.player = Player(self.assets['player'], self, (50, 50), (8, 15))
-
-        # again size indicates pixel length and height, in this case one value
-        # is given since the pixel height and width are the same
-        self.tilemap = Tilemap(self, 16)
-
+        })
+        self.sfx = Assets()
+        # everything else is loaded on worker threads once the first menu frame is up (see prefetch_assets)
+        self.asset_manager = AssetManager()
+        self.prefetching = False
+
+        # clouds, player and level are set up by setup_gameplay() when play first starts
+        self.gameplay_ready = False
+        self.level_loaded = False
+        self.music_loaded = False
         self.level = 0
-        self.load_level(self.level)
-
-        self.screen_shake = 16
+        # a map file, or a region directory written by scripts.streaming which is then streamed in around the camera
+        self.map_path = 'map.json'
+        self.streamer = None
 
         self.buttons_x = 400
 
@@ -108,238 +102,547 @@ class Game:
         self.settings_button = Button(self, self.buttons_x, 250, self.assets['settings'], 1)
         self.controls_button = Button(self, self.buttons_x, 150, self.assets['controls'], 1)
         self.main_menu_button = Button(self, 200, 10, self.assets['main_menu_btn'], 1)
+        self.build_panels()
 
-        '''
-            game state meanings:
-            init -> 
-            pause ->
-            play ->        
-        '''
-        self.game_state = 'init'
+        # the screens of the game, run() draws whichever is on top (see scripts/scenes.py)
+        self.scenes = SceneStack()
 
         self.zoom_level = 1
+        # scales display_2 up to the screen, the background covers all of display_2 so it's opaque
+        self.presenter = Presenter(self.screen, PRESENT_FILTER, opaque=True)
+
+        # only the parts of the window that changed are pushed to it each frame
+        self.dirty = DirtyRects(self.screen.get_size())
+        # scroll, zoom and transition of the last rendered frame, while they stay the same only changed parts are pushed
+        self.last_view = None
 
         pygame.font.init()  # you have to call this at the start,
 
+    # composites the menu screens once, they are only drawn again where a button changes
+    def build_panels(self):
+        font = pygame.font.SysFont('Comic Sans MS', 15)
+        text_surface = font.render('Check Controls b4 testing', False, (255, 255, 255))
+        self.title_panel = Panel(self.screen.get_size())
+        self.title_panel.layer.fill((0, 0, 0))  # should replace with a background
+        title = self.assets['title']
+        self.title_panel.layer.blit(pygame.transform.scale(title, (title.get_width() * 1.5, title.get_height() * 1.5)), (5, 20))
+        self.title_panel.layer.blit(text_surface, (105, 60))
+        for button in (self.start_button, self.exit_button, self.controls_button, self.settings_button):
+            self.title_panel.add(button)
+
+        # its layer is the last frame of gameplay, captured when the game is paused
+        self.pause_panel = Panel(self.screen.get_size())
+        self.pause_panel.add(self.continue_button)
+        self.pause_panel.add(self.main_menu_button)
+
+        self.controls_panel = Panel(self.screen.get_size())
+        background = pygame.Surface(self.internal_surface_size, pygame.SRCALPHA)
+        background.blit(self.assets['controls_bg'], (0, 0))
+        self.controls_panel.layer.blit(pygame.transform.scale(background, self.screen.get_size()), (0, 0))
+        self.controls_panel.add(self.main_menu_button)
+
+    # queues every gameplay asset on the loading threads, they are only waited on if play starts before they are done
+    def prefetch_assets(self):
+        if self.prefetching:
+            return
+        self.prefetching = True
+        load = self.asset_manager
+        self.assets.update({
+            'decor': load.images('tiles/decor'),
+            'grass': load.images('tiles/grass'),
+            'large_decor': load.images('tiles/large_decor'),
+            'stone': load.images('tiles/stone'),
+            'player': load.image('entities/player.png'),
+            'background': load.image('background.png'),
+            'clouds': load.images('clouds'),
+            'enemy/idle': load.animation('entities/enemy/idle', 6),
+            'enemy/run': load.animation('entities/enemy/run', 4),
+            'player/idle': load.animation('entities/player/idle', 6),
+            'player/run': load.animation('entities/player/run', 4),
+            'player/jump': load.animation('entities/player/jump'),
+            'player/slide': load.animation('entities/player/slide'),
+            'player/wall_slide': load.animation('entities/player/wall_slide'),
+            'particle/leaf': load.animation('particles/leaf', img_dur=20, loop=False),
+            'particle/particle': load.animation('particles/particle', img_dur=6, loop=False),
+            'gun': load.image('gun.png'),
+            'projectile': load.image('projectile.png'),
+        })
+
+        self.sfx.update({
+            'jump': load.sound('data/sfx/jump.wav', volume=0.7),
+            'dash': load.sound('data/sfx/dash.wav', volume=0.3),
+            'hit': load.sound('data/sfx/hit.wav', volume=0.8),
+            'shoot': load.sound('data/sfx/shoot.wav', volume=0.4),
+            # 'ambience': load.sound('data/sfx/ambience.wav', volume=0.2),
+        })
+
+    # creates everything gameplay needs, waiting on any gameplay assets that are still loading
+    def setup_gameplay(self):
+        self.prefetch_assets()
+        self.clouds = Clouds(self.assets['clouds'], count=16)
+
+        # instantiates player
+        # size indicates the actual pixel width and length of the character
+
+        self.player = Player(self.assets['player'], self, (50, 50), (8, 15))
+
+        # again size indicates pixel length and height, in this case one value
+        # is given since the pixel height and width are the same
+        self.tilemap = Tilemap(self, 16)
+        # kept for the whole session so the projectile pool is reused, load_level empties them
+        self.enemies = EnemyGroup(self)
+        self.projectiles = ProjectilePool()
+
+        self.load_level(self.level)
+
+        self.screen_shake = 16
+        self.gameplay_ready = True
+
     # Initiates the game with a given level
     def load_level(self, map_id):
         # self.tilemap.load('data/maps/' + str(map_id) + '.json')
-        self.tilemap.load('map.json')
+        if self.streamer:
+            self.streamer.shutdown()
+            self.streamer = None
+        if os.path.isdir(self.map_path):
+            self.streamer = RegionStreamer(self.tilemap, self.map_path)
+            spawners = [dict(spawner, pos=list(spawner['pos'])) for spawner in self.streamer.spawners]
+        else:
+            self.tilemap.load(self.map_path)
+            spawners = self.tilemap.extract([('spawners', 0), ('spawners', 1)])
 
         # filled with rects
+        # (trees of a streamed map are only loaded with their region, so those get no leaf spawners)
         self.leaf_spawners = []
         for tree in self.tilemap.extract([('large_decor', 2)], keep=True):
             self.leaf_spawners.append(pygame.Rect(4 + tree['pos'][0], 4 + tree['pos'][1], 23, 13))
 
-        for spawner in self.tilemap.extract([('spawners', 0), ('spawners', 1)]):
+        # every entity is kept in a grid so overlap checks (dash hits) only look at nearby ones
+        self.entity_grid = SpatialGrid(ENTITY_CELL_SIZE)
+        self.enemies.clear()
+        for spawner in spawners:
             if spawner['variant'] == 0:
                 self.player.pos = spawner['pos']
+                self.player.prev_pos = list(self.player.pos)
                 self.player.air_time = 0
+            else:
+                # variant 1 spawners place enemies (see ENEMY HANDLING)
+                self.enemies.add(Enemy(self, spawner['pos'], (8, 15)))
+        self.player.sync_grid(self.entity_grid)
+        for enemy in self.enemies:
+            enemy.sync_grid(self.entity_grid)
 
-        self.projectiles = []
-        self.particles = []
-        self.sparks = []
+        if self.streamer:
+            # the regions around the player are loaded before the level starts, everything else streams in
+            w, h = self.display.get_size()
+            self.streamer.require((self.player.pos[0] - w, self.player.pos[1] - h, w * 2, h * 2))
+
+        self.projectiles.clear()
+        self.particles = ParticleSystem(self)
+        self.sparks = SparkSystem()
 
         self.scroll = [0, 0]
+        # scroll before the last step, rendering blends between the two
+        self.prev_scroll = [0, 0]
         # 0 means that player is alive, once the player dies a counter begins to increment
         self.dead = 0
         # -30 should make a completely black screen while zero is just how the game normally looks
         self.transition = -30
+        self.level_loaded = True
+
+    # lets go of what the level holds (the streaming thread, entities, effects) when play is left for the title
+    def release_level(self):
+        if self.streamer:
+            self.streamer.shutdown()
+            self.streamer = None
+        self.entity_grid.clear()
+        self.enemies.clear()
+        self.projectiles.clear()
+        self.particles.clear()
+        self.sparks.clear()
+        self.level_loaded = False
 
     def settings(self):
         pass
 
-    def controls(self):
-        while self.game_state == 'controls':
-            self.display_2.fill((0, 0, 0, 0))
-            self.display_2.blit(self.assets['controls_bg'], (0, 0))
-            self.screen.blit(pygame.transform.scale(self.display_2, self.screen.get_size()), (0, 0))
-
-            if self.main_menu_button.draw(self.screen):
-                self.game_state = 'init'
-                self.menu()
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-
-            pygame.display.update()
-            self.clock.tick(60)
-
-    def menu(self):
-        my_font = pygame.font.SysFont('Comic Sans MS', 15)
-        text_surface = my_font.render('Check Controls b4 testing', False, (255, 255, 255))
-        while self.game_state == 'init' or self.game_state == 'paused':
-            self.display.fill((0, 0, 0, 0))
-
-            mouse = pygame.mouse.get_pos()
-
-            if self.game_state == 'init':  # game hasnt begun or new game is beginning
-                pygame.mixer.music.pause()
-                self.screen.fill((0, 0, 0, 0)) # should replace with a background
-
-                self.screen.blit(pygame.transform.scale(self.assets['title'], (
-                self.assets['title'].get_width() * 1.5, self.assets['title'].get_height() * 1.5)), (5, 20))
-
-                self.screen.blit(text_surface, (105, 60))
-
-                if self.start_button.draw(self.screen):
-                    self.game_state = 'play'
-                    self.run()
-
-                if self.exit_button.draw(self.screen):
-                    pygame.quit()
-                    sys.exit()
-
-                if self.controls_button.draw(self.screen):
-                    self.game_state = 'controls'
-                    self.controls()
-
-                if self.settings_button.draw(self.screen):
-                    self.settings()
+    # the game loop, runs frames of the top scene until there are none left
+    def run(self, scene=None):
+        self.scenes.push(scene or TitleScene(self))
+        while len(self.scenes):
+            self.scenes.top().frame()
+        pygame.quit()
+
+    # advances the game by one fixed SIM_STEP
+    def step(self):
+        # every entity animation moves on from this one tick
+        animation_clock.advance()
+        self.screen_shake = max(0, self.screen_shake - 1)
+
+        if self.transition < 0:
+            self.transition += 1
+
+        if self.dead:
+            self.dead += 1
+            if self.dead >= 10:
+                self.transition = min(self.transition + 1, 30)
+            if self.dead > 40:
+                self.load_level(self.level)
+
+        # self.scroll[0] += 1  # moves entities and tilemap to the left by n pixels every frame
+        # last integer effects tracking: 1 = dead on, 30 = loose
+        self.prev_scroll = list(self.scroll)
+        self.scroll[0] += (self.player.rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / 5
+        self.scroll[1] += (self.player.rect().centery - self.display.get_height() / 2 - self.scroll[1]) / 5
+
+        if self.streamer:
+            self.streamer.update((self.scroll[0], self.scroll[1], self.display.get_width(), self.display.get_height()))
+
+        # # populates particles list
+        # for rect in self.leaf_spawners:
+        #     # allows leafs to spawn at random
+        #     if random.random() * 49999 < rect.width * rect.height:
+        #         # sets spawn position to random point between the bounds of the rect
+        #         pos = (rect.x + random.random() * rect.width, rect.y + random.random() * rect.height)
+        #         # spawns particles
+        #         self.particles.emit('leaf', pos, velocity=[-0.1, 0.3], frame=random.randint(0, 20))
+
+        self.clouds.update()
+
+        self.step_enemies()
+
+        # on a streamed map the player waits if the ground under them hasn't been loaded yet
+        if not self.dead and self.ground_loaded(self.player.rect().center):  # if self.dead is zero
+            self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
+            self.player.sync_grid(self.entity_grid)
+            self.step_dash_hits()
+
+        self.step_projectiles()
+
+        # finished particles are removed on the next update
+        self.particles.update()
+        # stopped sparks free their slot on the next update
+        self.sparks.update()
+
+    # True if the tiles around a position are there to stand on, only ever False while a streamed map loads
+    def ground_loaded(self, pos):
+        return not self.streamer or self.streamer.is_loaded(pos)
+
+    # ENEMY HANDLING
+    # enemies come from variant 1 spawners and fire projectiles at the player, the default map.json has none
+
+    # steps the enemies, only the ones around the camera move
+    def step_enemies(self):
+        self.enemies.update(self.tilemap, (self.scroll[0] + self.display.get_width() / 2, self.scroll[1] + self.display.get_height() / 2))
+
+    # a dash kills the enemies the player overlaps, found with one grid query instead of a check per enemy
+    def step_dash_hits(self):
+        if abs(self.player.dashing) >= 50:
+            for handle in self.entity_grid.query_rect(self.player.rect()):
+                enemy = self.entity_grid.get(handle)
+                if enemy is not self.player:
+                    enemy.hit()
+                    self.entity_grid.remove(handle)
+                    self.enemies.remove(enemy)
+
+    # projectiles that hit a wall or time out go back to the pool, one that hits the player kills them
+    def step_projectiles(self):
+        target = self.player.rect() if abs(self.player.dashing) < 50 and not self.dead else None
+        if self.projectiles.update(self.tilemap, target):
+            self.sfx['hit'].play(0)
+            self.screen_shake = max(16, self.screen_shake)
+            self.dead += 1
+
+    """
+        draws the current state of the game to the screen
+            alpha: fraction of a step since the last one (0 -> 1), positions are blended between steps by it
+    """
+    def render(self, alpha=1):
+        self.display.fill((0, 0, 0, 0))
+        # background is placed on display 2
+        self.display_2.blit(self.assets['background'], (0, 0))
+
+        render_scroll = (int(self.prev_scroll[0] + (self.scroll[0] - self.prev_scroll[0]) * alpha),
+                         int(self.prev_scroll[1] + (self.scroll[1] - self.prev_scroll[1]) * alpha))
+        # all onscreen items are offset by the render scroll
+
+        # while the view stays put only what moved is pushed to the window, gathered here in display pixels
+        view = (render_scroll, self.zoom_level, self.transition)
+        if view != self.last_view:
+            self.dirty.mark_all()
+            self.last_view = view
+        changed = []
+
+        # CLOUD HANDLING
+        # clouds are printed on display 2
+        self.clouds.render(self.display_2, render_scroll, changed)
+        self.profiler.end_phase('clouds')
+
+        # TILEMAP HANDLING
+        # tiles are printed on display, their cached silhouettes are added to the outline
+        self.outline.clear()
+        self.tilemap.render(self.display, offset=render_scroll, outline=self.outline)
+        self.profiler.end_phase('tilemap')
+
+        self.enemies.render(self.display, offset=render_scroll, outline=self.outline, alpha=alpha)
+        img = self.assets['projectile']
+        for projectile in self.projectiles:
+            pos = (projectile.pos[0] - img.get_width() / 2 - render_scroll[0], projectile.pos[1] - img.get_height() / 2 - render_scroll[1])
+            self.display.blit(img, pos)
+            # everything drawn on display is outlined, projectiles too
+            self.outline.add(img, pos)
+        self.profiler.end_phase('enemies')
+
+        # PLAYER HANDLING
+        if not self.dead:  # if self.dead is zero
+            # player is printed on display
+            self.player.render(self.display, offset=render_scroll, outline=self.outline, alpha=alpha)
+        self.profiler.end_phase('player')
+
+        # projectile consists of: [[x, y], direction, timer]
+        # adds semi transparent sillouhette to all interactable objects
+        # (built from per image silhouettes rather than masking the whole display)
+        self.outline.render(self.display_2)
+        self.profiler.end_phase('outline')
+
+        self.particles.render(self.display, offset=render_scroll)
+        self.sparks.render(self.display, offset=render_scroll)
+        self.profiler.end_phase('particles')
+
+        # won't run while transition is at zero
+        if self.transition:
+            transition_surf = pygame.Surface(self.display.get_size())
+            pygame.draw.circle(transition_surf, (255, 255, 255),
+                               (self.display.get_width() // 2, self.display.get_height() // 2),
+                               (30 - abs(self.transition)) * 8)
+            transition_surf.set_colorkey((255, 255, 255))
+            self.display.blit(transition_surf, (0, 0))
+        self.profiler.end_phase('transition')
+
+        # self.display is blitted onto self.display_2
+        self.display_2.blit(self.display, (0, 0))
+        # display_2 is scaled up onto the screen, only the part that ends up on it
+        scaled_rect = self.presenter.present(self.display_2, self.zoom_level)
+        self.profiler.end_phase('scale')
+        self.mark_changed(changed, render_scroll, alpha, scaled_rect)
+        overlay = self.profiler.render(self.screen)
+        if overlay:
+            self.dirty.mark(overlay)
+
+    """
+        tells self.dirty which parts of the window this frame changed: the clouds that moved
+        (already in changed) and everything that can move on the display, scaled up to the window
+    """
+    def mark_changed(self, changed, render_scroll, alpha, scaled_rect):
+        w, h = self.display.get_size()
+        margin = ENTITY_DRAW_MARGIN
+        for handle in self.entity_grid.query_rect((render_scroll[0] - margin, render_scroll[1] - margin, w + margin * 2, h + margin * 2)):
+            entity = self.entity_grid.get(handle)
+            pos = entity.render_pos(alpha)
+            changed.append((pos[0] - render_scroll[0] - margin, pos[1] - render_scroll[1] - margin, entity.size[0] + margin * 2, entity.size[1] + margin * 2))
+        img = self.assets['projectile']
+        for projectile in self.projectiles:
+            changed.append((projectile.pos[0] - img.get_width() - render_scroll[0], projectile.pos[1] - img.get_height() - render_scroll[1], img.get_width() * 2, img.get_height() * 2))
+        # particles and sparks are covered by one box each around all of them
+        for system in (self.particles, self.sparks):
+            if system.count:
+                low = system.pos[:system.count].min(axis=0)
+                high = system.pos[:system.count].max(axis=0)
+                changed.append((low[0] - render_scroll[0] - margin, low[1] - render_scroll[1] - margin, high[0] - low[0] + margin * 2, high[1] - low[1] + margin * 2))
+
+        scale = scaled_rect.width / w
+        for rect in changed:
+            self.dirty.mark_scaled(rect, scaled_rect.topleft, scale)
+
+
+"""
+    A menu screen drawn from one of the game's Panels, it sleeps in wait_events() between inputs
+    and hands the buttons clicked to click()
+"""
+class MenuScene(Scene):
+    def __init__(self, game, panel):
+        super().__init__(game)
+        self.panel = panel
+
+    def enter(self):
+        self.panel.open()
+
+    def resume(self):
+        self.panel.open()
+
+    def click(self, button):
+        pass
 
+    def frame(self):
+        game = self.game
+        self.panel.render(game.screen, game.dirty)
+        game.dirty.flush()
+        if not game.first_frame_shown:
+            game.first_frame_shown = True
+            print('time to first frame: %.1f ms' % ((time.perf_counter() - game.start_time) * 1000))
+            game.prefetch_assets()
+        # the menu is mostly idle, so gameplay assets that finished loading get converted in the meantime
+        game.assets.finish_ready()
+        game.sfx.finish_ready()
+
+        # sleeps until there is input, nothing is drawn while the mouse isn't moving
+        for event in wait_events():
+            if event.type == pygame.QUIT:
+                game.scenes.clear()
             else:
-                if self.continue_button.draw(self.screen):
-                    self.game_state = 'play'
-                    self.run()
-
-                if self.main_menu_button.draw(self.screen):
-                    self.game_state = 'init'
-                    self.load_level('map.json')
-                    self.menu()
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-
-            pygame.display.update()
-            self.clock.tick(60)
-
-    def run(self):
-        # wav files are easier to deal with
-        pygame.mixer.music.load('data/music.wav')
+                clicked = self.panel.handle_event(event)
+                if clicked:
+                    self.click(clicked)
+            # a click that changed scenes leaves the rest of the input to the next frame
+            if game.scenes.top() is not self:
+                return
+        game.clock.tick(60)
+
+
+class TitleScene(MenuScene):
+    def __init__(self, game):
+        super().__init__(game, game.title_panel)
+
+    def enter(self):
+        pygame.mixer.music.pause()
+        super().enter()
+
+    def click(self, button):
+        game = self.game
+        if button is game.start_button:
+            game.scenes.switch(PlayScene(game))
+        elif button is game.exit_button:
+            game.scenes.clear()
+        elif button is game.controls_button:
+            game.scenes.push(ControlsScene(game))
+        elif button is game.settings_button:
+            game.settings()
+
+
+class ControlsScene(MenuScene):
+    def __init__(self, game):
+        super().__init__(game, game.controls_panel)
+
+    def click(self, button):
+        if button is self.game.main_menu_button:
+            self.game.scenes.pop()
+
+
+# pushed over PlayScene by escape, drawn over the last frame of gameplay
+class PauseScene(MenuScene):
+    def __init__(self, game):
+        super().__init__(game, game.pause_panel)
+
+    def enter(self):
+        self.panel.capture(self.game.screen)
+        super().enter()
+
+    def click(self, button):
+        game = self.game
+        if button is game.continue_button:
+            game.scenes.pop()
+        elif button is game.main_menu_button:
+            game.scenes.switch(TitleScene(game))
+
+
+"""
+    Gameplay. Steps the simulation at a fixed SIM_STEP and draws a frame per pass of the game loop.
+    Leaving it for the title releases the level, entering it again loads the level from the start.
+"""
+class PlayScene(Scene):
+    def __init__(self, game):
+        super().__init__(game)
+        # seconds of real time that haven't been simulated yet
+        self.accumulator = 0
+        self.last_time = 0
+
+    def enter(self):
+        game = self.game
+        if not game.gameplay_ready:
+            game.setup_gameplay()
+        elif not game.level_loaded:
+            game.load_level(game.level)
+
+        # wav files are easier to deal with, the file is only opened the first time play starts
+        if not game.music_loaded:
+            pygame.mixer.music.load('data/music.wav')
+            game.music_loaded = True
         pygame.mixer.music.set_volume(0.5)
         # .play function takes the number of loops, 0 means no loop and -1 means infinite loop
         pygame.mixer.music.play(-1)
         # self.sfx['ambience'].play(-1)
 
-        while True:
-            self.display.fill((0, 0, 0, 0))
-            # background is placed on display 2
-            self.display_2.blit(self.assets['background'], (0, 0))
-
-            self.screen_shake = max(0, self.screen_shake - 1)
-
-            print(self.level)
-
-            if self.transition < 0:
-                self.transition += 1
-
-            if self.dead:
-                self.dead += 1
-                if self.dead >= 10:
-                    self.transition = min(self.transition + 1, 30)
-                if self.dead > 40:
-                    self.load_level(self.level)
-
-            # self.scroll[0] += 1  # moves entities and tilemap to the left by n pixels every frame
-            # last integer effects tracking: 1 = dead on, 30 = loose
-            self.scroll[0] += (self.player.rect().centerx - self.display.get_width() / 2 - self.scroll[0]) / 5
-            self.scroll[1] += (self.player.rect().centery - self.display.get_height() / 2 - self.scroll[1]) / 5
-            render_scroll = (int(self.scroll[0]), int(self.scroll[1]))
-            # all onscreen items are offset by the render scroll
-
-            # # populates particles list
-            # for rect in self.leaf_spawners:
-            #     # allows leafs to spawn at random
-            #     if random.random() * 49999 < rect.width * rect.height:
-            #         # sets spawn position to random point between the bounds of the rect
-            #         pos = (rect.x + random.random() * rect.width, rect.y + random.random() * rect.height)
-            #         # spawns particles
-            #         self.particles.append(
-            #             Particle(self, 'leaf', pos, velocity=[-0.1, 0.3], frame=random.randint(0, 20)))
-
-            # CLOUD HANDLING
-            # clouds are printed on display 2
-            self.clouds.update()
-            self.clouds.render(self.display_2, render_scroll)
-
-            # TILEMAP HANDLING
-            # tiles are printed on display
-            self.tilemap.render(self.display, offset=render_scroll)
-
-            # Enemy handling
-
-            # PLAYER HANDLING
-            if not self.dead:  # if self.dead is zero
-                self.player.update(self.tilemap, (self.movement[1] - self.movement[0], 0))
-                # player is printed on display
-                self.player.render(self.display, offset=render_scroll)
-
-            # projectile consists of: [[x, y], direction, timer]
-            # adds semi transparent sillouhette to all interactable objects
-            display_mask = pygame.mask.from_surface(self.display)
-            display_sillhouette = display_mask.to_surface(setcolor=(0, 0, 0, 180), unsetcolor=(0, 0, 0, 0))
-            for offset in [(-1, 0), (0, -1), (1, 0), (0, 1)]:
-                self.display_2.blit(display_sillhouette, offset)
-
-            # handles animation for each particle
-            for particle in self.particles.copy():
-                # if animation is finished kill becomes true
-                kill = particle.update()
-                # particle is rendered on screen
-                particle.render(self.display, offset=render_scroll)
-                if particle.type == 'leaf':
-                    particle.pos[0] += math.sin(particle.animation.frame * 0.035) * 0.3
-                if kill:
-                    self.particles.remove(particle)
-
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
-                # if key has been pressed down
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_LEFT:
-                        self.movement[0] = True
-                    if event.key == pygame.K_RIGHT:
-                        self.movement[1] = True
-                    if event.key == pygame.K_UP:
-                        if self.player.jump():
-                            self.sfx['jump'].play(0)
-                    if event.key == pygame.K_x:
-                        self.player.dash()
-                    if event.key == pygame.K_ESCAPE:
-                        self.game_state = 'paused'
-                        self.menu()
-                # if key is not currently being pressed down
-                if event.type == pygame.KEYUP:
-                    if event.key == pygame.K_LEFT:
-                        self.movement[0] = False
-                    if event.key == pygame.K_RIGHT:
-                        self.movement[1] = False
-                if event.type == pygame.MOUSEWHEEL:
-                    self.zoom_level = max(1, self.zoom_level + (0.05 * event.y))
-
-            # won't run while transition is at zero
-            if self.transition:
-                transition_surf = pygame.Surface(self.display.get_size())
-                pygame.draw.circle(transition_surf, (255, 255, 255),
-                                   (self.display.get_width() // 2, self.display.get_height() // 2),
-                                   (30 - abs(self.transition)) * 8)
-                transition_surf.set_colorkey((255, 255, 255))
-                self.display.blit(transition_surf, (0, 0))
-
-            # self.display is blitted onto self.display_2
-            self.display_2.blit(self.display, (0, 0))
-            scaled_surf = pygame.transform.scale(self.display_2, self.internal_surface_size_vector * self.zoom_level)
-            scaled_rect = scaled_surf.get_rect(center=(self.half_w, self.half_h))
-            self.screen.blit(scaled_surf, scaled_rect)
-            # self.screen.blit(pygame.transform.scale(self.display_2, ((self.screen.get_width() * (self.zoom_level)), self.screen.get_height() * (self.zoom_level))), (0, 0))
-            pygame.display.update()
-            self.clock.tick(60)
-
-
-Game().menu()
\ No newline at end of file
+        self.accumulator = 0
+        self.last_time = time.perf_counter()
+        game.dirty.mark_all()
+
+    def exit(self):
+        pygame.mixer.music.stop()
+        self.game.movement = [False, False]
+        self.game.release_level()
+
+    def resume(self):
+        # time spent paused shouldn't be simulated
+        self.last_time = time.perf_counter()
+        self.game.dirty.mark_all()
+
+    def frame(self):
+        game = self.game
+        game.profiler.begin_frame()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                game.scenes.clear()
+                return
+            # if key has been pressed down
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_LEFT:
+                    game.movement[0] = True
+                if event.key == pygame.K_RIGHT:
+                    game.movement[1] = True
+                if event.key == pygame.K_UP:
+                    if game.player.jump():
+                        game.sfx['jump'].play(0)
+                if event.key == pygame.K_x:
+                    game.player.dash()
+                if event.key == pygame.K_ESCAPE:
+                    game.scenes.push(PauseScene(game))
+                    # the rest of the input goes to the pause menu
+                    return
+                if event.key == pygame.K_F3:
+                    game.profiler.toggle()
+                if event.key == pygame.K_F4:
+                    game.profiler.export_csv('profile.csv')
+            # if key is not currently being pressed down
+            if event.type == pygame.KEYUP:
+                if event.key == pygame.K_LEFT:
+                    game.movement[0] = False
+                if event.key == pygame.K_RIGHT:
+                    game.movement[1] = False
+            if event.type == pygame.MOUSEWHEEL:
+                game.zoom_level = max(1, game.zoom_level + (0.05 * event.y))
+        game.profiler.end_phase('events')
+
+        # the simulation always moves in SIM_STEP sized steps no matter how fast frames are drawn,
+        # when frames are slow it runs several steps to catch up (but never more than MAX_CATCH_UP_STEPS)
+        now = time.perf_counter()
+        self.accumulator += now - self.last_time
+        self.last_time = now
+        steps = 0
+        while self.accumulator >= SIM_STEP and steps < MAX_CATCH_UP_STEPS:
+            game.step()
+            self.accumulator -= SIM_STEP
+            steps += 1
+        if steps == MAX_CATCH_UP_STEPS:
+            # too far behind, drop the time instead of spiralling
+            self.accumulator = 0
+        game.profiler.end_phase('simulation')
+
+        # how far we are between the last step and the next one, used to smooth movement
+        game.render(self.accumulator / SIM_STEP)
+        game.profiler.count('pixels pushed', game.dirty.flush())
+        game.profiler.end_phase('display')
+        game.clock.tick(game.max_fps)
+
+
+if __name__ == '__main__':
+    Game().run()
\ No newline at end of file
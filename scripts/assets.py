@@ -0,0 +1,91 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from scripts.atlas import BASE_IMAG_PATH, read_atlas, slice_atlas
+from scripts.utils import Animation
+
+
+"""
+    An asset that is being loaded on a worker thread.
+    get() waits for it if it isn't done yet and then runs the finishing step (converting
+    surfaces, applying volumes) on the calling thread, which is always the main thread here.
+"""
+class AssetHandle:
+    def __init__(self, future, finish=None):
+        self.future = future
+        self.finish = finish
+        self.value = None
+        self.resolved = False
+
+    def ready(self):
+        return self.resolved or self.future.done()
+
+    def get(self):
+        if not self.resolved:
+            value = self.future.result()
+            self.value = self.finish(value) if self.finish else value
+            self.resolved = True
+            self.future = None
+        return self.value
+
+
+"""
+    Decodes images and sounds on a pool of worker threads and hands back AssetHandles.
+    Files are read in the order they are requested, so queue what is needed first first.
+"""
+class AssetManager:
+    def __init__(self, workers=4):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='assets')
+
+    # same result as utils.load_image
+    def image(self, path):
+        def finish(img):
+            img = img.convert()
+            img.set_colorkey((0, 0, 0))
+            return img
+        return AssetHandle(self.pool.submit(pygame.image.load, BASE_IMAG_PATH + path), finish)
+
+    # same result as utils.load_images
+    def images(self, path):
+        return AssetHandle(self.pool.submit(read_atlas, path), lambda result: slice_atlas(*result))
+
+    def animation(self, path, img_dur=5, loop=True):
+        return AssetHandle(self.pool.submit(read_atlas, path), lambda result: Animation(slice_atlas(*result), img_dur, loop))
+
+    def sound(self, path, volume=None):
+        def load():
+            sound = pygame.mixer.Sound(path)
+            if volume is not None:
+                sound.set_volume(volume)
+            return sound
+        return AssetHandle(self.pool.submit(load))
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+"""
+    dict of asset name -> asset, where values can still be AssetHandles.
+    A handle is swapped for its asset the first time that name is read.
+"""
+class Assets(dict):
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, AssetHandle):
+            value = value.get()
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    # how many assets are still loading
+    def pending(self):
+        return sum(1 for value in self.values() if isinstance(value, AssetHandle) and not value.ready())
+
+    # finishes every asset whose loading thread is done, so nothing has to wait when gameplay starts
+    def finish_ready(self):
+        for key, value in list(self.items()):
+            if isinstance(value, AssetHandle) and value.ready():
+                self[key]
@@ -0,0 +1,158 @@
+"""
+    Packs every image of a directory under data/images into one atlas image plus a json index,
+    so loading a directory at startup is one PNG decode instead of one per file.
+    Atlases are written to data/cache/atlas/ and rebuilt whenever a source file's size or
+    modification time changes.
+
+    Build all of them ahead of time with:  python -m scripts.atlas
+"""
+import hashlib
+import json
+import os
+import sys
+
+import pygame
+
+BASE_IMAG_PATH = 'data/images/'
+ATLAS_PATH = 'data/cache/atlas/'
+# widest an atlas gets before images wrap onto a new shelf
+ATLAS_MAX_WIDTH = 1024
+# black gap between images, black is the colorkey so it never shows up
+ATLAS_PADDING = 1
+
+
+# returns the sorted image file names of a directory under data/images (sub directories are skipped)
+def image_names(path):
+    return sorted(name for name in os.listdir(BASE_IMAG_PATH + path) if os.path.isfile(BASE_IMAG_PATH + path + '/' + name))
+
+
+"""
+    returns a hash of the names, sizes and modification times of the files in a directory,
+    the atlas of the directory is stale once this changes
+"""
+def source_key(path, names):
+    digest = hashlib.sha1()
+    for name in names:
+        stat = os.stat(BASE_IMAG_PATH + path + '/' + name)
+        digest.update(('%s:%d:%d;' % (name, stat.st_size, stat.st_mtime_ns)).encode())
+    return digest.hexdigest()
+
+
+# data/images/tiles/grass -> data/cache/atlas/tiles_grass
+def atlas_file(path):
+    return ATLAS_PATH + path.strip('/').replace('/', '_')
+
+
+"""
+    places images on shelves (rows) from tallest to shortest and returns
+    the atlas size and one (x, y) per image
+"""
+def pack(sizes):
+    order = sorted(range(len(sizes)), key=lambda i: -sizes[i][1])
+    positions = [None] * len(sizes)
+    x = y = shelf_height = width = 0
+    for i in order:
+        w, h = sizes[i]
+        if x and x + w > ATLAS_MAX_WIDTH:
+            x = 0
+            y += shelf_height + ATLAS_PADDING
+            shelf_height = 0
+        positions[i] = (x, y)
+        x += w + ATLAS_PADDING
+        width = max(width, x)
+        shelf_height = max(shelf_height, h)
+    return (max(1, width), max(1, y + shelf_height)), positions
+
+
+# packs a directory into an atlas and writes the png and its index, returns the index
+def build_atlas(path, names=None, key=None):
+    names = image_names(path) if names is None else names
+    key = source_key(path, names) if key is None else key
+    images = [pygame.image.load(BASE_IMAG_PATH + path + '/' + name) for name in names]
+    size, positions = pack([img.get_size() for img in images])
+
+    atlas = pygame.Surface(size, 0, 24)
+    atlas.fill((0, 0, 0))
+    for img, pos in zip(images, positions):
+        # converting first copies the colours straight across, the same as convert() does when loading one file
+        atlas.blit(img.convert(atlas), pos)
+
+    index = {'key': key, 'images': [[name, pos[0], pos[1], img.get_width(), img.get_height()] for name, img, pos in zip(names, images, positions)]}
+    os.makedirs(ATLAS_PATH, exist_ok=True)
+    pygame.image.save(atlas, atlas_file(path) + '.png')
+    f = open(atlas_file(path) + '.json', 'w')
+    json.dump(index, f)
+    f.close()
+    return index
+
+
+# returns the index of a directory's atlas if it is up to date with the source files, otherwise None
+def cached_index(path, key):
+    try:
+        f = open(atlas_file(path) + '.json', 'r')
+        index = json.load(f)
+        f.close()
+    except (OSError, ValueError):
+        return None
+    if index.get('key') != key or not os.path.exists(atlas_file(path) + '.png'):
+        return None
+    return index
+
+
+"""
+    reads a directory's atlas (building it first if needed) without converting it,
+    so it can run on a loading thread, returns (atlas surface, index)
+"""
+def read_atlas(path):
+    names = image_names(path)
+    key = source_key(path, names)
+    index = cached_index(path, key)
+    if index is None:
+        index = build_atlas(path, names, key)
+    return pygame.image.load(atlas_file(path) + '.png'), index
+
+
+# converts an atlas read by read_atlas and cuts it into one colorkeyed subsurface per image
+def slice_atlas(atlas, index):
+    atlas = atlas.convert()
+    atlas.set_colorkey((0, 0, 0))
+    images = []
+    for name, x, y, w, h in index['images']:
+        img = atlas.subsurface((x, y, w, h))
+        img.set_colorkey((0, 0, 0))
+        images.append(img)
+    return images
+
+
+"""
+    returns the images of a directory as subsurfaces of its atlas, building the atlas first if needed
+"""
+def load_atlas(path):
+    return slice_atlas(*read_atlas(path))
+
+
+# every directory under data/images that directly holds images
+def image_directories():
+    directories = []
+    for root, dirs, files in os.walk(BASE_IMAG_PATH):
+        if any(name.endswith('.png') for name in files) and root.rstrip('/') != BASE_IMAG_PATH.rstrip('/'):
+            directories.append(os.path.relpath(root, BASE_IMAG_PATH).replace(os.sep, '/'))
+    return sorted(directories)
+
+
+def main():
+    # converting images needs a display, a hidden 1x1 window is enough
+    pygame.display.init()
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    for path in image_directories():
+        names = image_names(path)
+        key = source_key(path, names)
+        if cached_index(path, key) is None:
+            build_atlas(path, names, key)
+            print('built', atlas_file(path) + '.png')
+        else:
+            print('up to date', atlas_file(path) + '.png')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,11 @@ import pygame
 from pygame import BLEND_RGB_SUB
 
 
+"""
+    A clickable image, drawn inverted while the mouse is over it. It follows the mouse through
+    the events given to handle_event instead of polling it, and sets changed when its highlight
+    flips so the Panel it is on knows to draw it again.
+"""
 class Button():
     def __init__(self, game, x, y, image, scale=1):
         width = image.get_width()
@@ -15,34 +20,28 @@ class Button():
         self.inverted_image = inv
         self.rect = self.image.get_rect()
         self.rect.topleft = (x, y)
-        self.clicked = False
-        self.highlighted = False
         self.is_over = False
-
-    def draw(self, surface):
-        action = False
-        # get mouse position
-        pos = pygame.mouse.get_pos()
-
-        # check mouseover and clicked conditions
-        if self.rect.collidepoint(pos):
-            self.is_over = True
-            if pygame.mouse.get_pressed()[0] == 1 and self.clicked == False:
-                self.clicked = True
-                action = True
-        else:
-            self.is_over = False
-
-        if pygame.mouse.get_pressed()[0] == 0:
-            self.clicked = False
-
+        # the button looks different from when it was last drawn
+        self.changed = True
+
+    def hover(self, pos):
+        is_over = bool(self.rect.collidepoint(pos))
+        if is_over != self.is_over:
+            self.is_over = is_over
+            self.changed = True
+
+    # returns True if the event clicks the button
+    def handle_event(self, event):
+        if event.type == pygame.MOUSEMOTION:
+            self.hover(event.pos)
+        elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.hover(event.pos)
+            return self.is_over
+        return False
+
+    def render(self, surface):
         if self.is_over:
             surface.blit(self.inverted_image, (self.rect.x, self.rect.y))
         else:
             surface.blit(self.image, (self.rect.x, self.rect.y))
-
-            # draw button on screen
-
-
-        return action
-
+        self.changed = False
@@ -0,0 +1,56 @@
+# tiles are grouped into square chunks so lookups are integer math instead of "x;y" strings
+CHUNK_SIZE = 16
+# shift and mask used to split a tile coordinate into (chunk coordinate, position inside the chunk)
+CHUNK_SHIFT = 4
+CHUNK_MASK = CHUNK_SIZE - 1
+
+# type id 0 means the cell is empty
+EMPTY = 0
+
+
+"""
+    returns the chunk key and the index inside that chunk for a tile coordinate
+    (>> and & floor towards -infinity so negative coordinates work as well)
+"""
+def chunk_index(x, y):
+    return (x >> CHUNK_SHIFT, y >> CHUNK_SHIFT), ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+
+
+class TileChunk:
+    __slots__ = ('pos', 'types', 'variants', 'count', 'solid')
+
+    def __init__(self, pos):
+        # (cx, cy) chunk coordinate
+        self.pos = pos
+        # one byte per cell, row major
+        self.types = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+        self.variants = bytearray(CHUNK_SIZE * CHUNK_SIZE)
+        # amount of cells that hold a tile, lets empty chunks be dropped
+        self.count = 0
+        # one byte per cell, 1 where the tile is solid, made from types by Tilemap.chunk_solid and dropped when types change
+        self.solid = None
+
+    def set(self, index, type_id, variant):
+        if self.types[index] == EMPTY:
+            self.count += 1
+        self.types[index] = type_id
+        self.variants[index] = variant
+        self.solid = None
+
+    def clear(self, index):
+        if self.types[index] != EMPTY:
+            self.count -= 1
+            self.types[index] = EMPTY
+            self.variants[index] = 0
+            self.solid = None
+
+    """
+        yields (x, y, type_id, variant) for every tile in the chunk, x and y are tile coordinates
+    """
+    def cells(self):
+        base_x = self.pos[0] << CHUNK_SHIFT
+        base_y = self.pos[1] << CHUNK_SHIFT
+        types = self.types
+        for index in range(CHUNK_SIZE * CHUNK_SIZE):
+            if types[index]:
+                yield (base_x + (index & CHUNK_MASK), base_y + (index >> CHUNK_SHIFT), types[index], self.variants[index])
@@ -6,14 +6,23 @@ class Cloud:
         self.img = img
         self.speed = speed
         self.depth = depth
+        # where the cloud was drawn last, to tell when it has moved on screen
+        self.last_blit = None
 
     def update(self):
         self.pos[0] += self.speed
 
-    def render(self, surf, offset=(0, 0)):
+    # changed: list that gets the rects of surf the cloud moved out of and into, if given
+    def render(self, surf, offset=(0, 0), changed=None):
         # depth is used to change the rate at which the cloud moves with the offset
         render_pos = (self.pos[0] - offset[0] * self.depth, self.pos[1] - offset[1] * self.depth)
-        surf.blit(self.img, (render_pos[0] % (surf.get_width() + self.img.get_width()) - self.img.get_width(), render_pos[1] % (surf.get_height() + self.img.get_height()) - self.img.get_height()))
+        blit_pos = (int(render_pos[0] % (surf.get_width() + self.img.get_width()) - self.img.get_width()), int(render_pos[1] % (surf.get_height() + self.img.get_height()) - self.img.get_height()))
+        surf.blit(self.img, blit_pos)
+        if changed is not None and blit_pos != self.last_blit:
+            changed.append(self.img.get_rect(topleft=blit_pos))
+            if self.last_blit is not None:
+                changed.append(self.img.get_rect(topleft=self.last_blit))
+        self.last_blit = blit_pos
 
 class Clouds:
     def __init__(self, cloud_images, count=16):
@@ -28,6 +37,6 @@ class Clouds:
         for cloud in self.clouds:
             cloud.update()
 
-    def render(self, surf, offset=(0, 0)):
+    def render(self, surf, offset=(0, 0), changed=None):
         for cloud in self.clouds:
-            cloud.render(surf, offset)
\ No newline at end of file
+            cloud.render(surf, offset, changed)
\ No newline at end of file
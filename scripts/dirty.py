@@ -0,0 +1,91 @@
+import math
+
+import pygame
+
+# when the changed rects cover more than this fraction of the window one full update is pushed instead
+FULL_UPDATE_FRACTION = 0.5
+
+
+"""
+    Collects the parts of the window that changed during a frame so flush() only sends those
+    to the display with display.update(rects). Everything is still drawn to the screen surface
+    as before, only what is pushed to the window shrinks. A rect is pushed on the frame it is
+    marked and the frame after, so whatever was drawn there last frame (an entity that moved
+    away, a button that stopped being highlighted) is replaced too.
+    mark_all() pushes the whole window, for when everything moves (scrolling, zooming, new screens).
+"""
+class DirtyRects:
+    def __init__(self, size):
+        self.bounds = pygame.Rect((0, 0), size)
+        # rects marked this frame and last frame, in window pixels
+        self.rects = []
+        self.last_rects = []
+        self.full = True
+
+        # pixels sent to the window by the last flush, and over every flush so far
+        self.pixels = 0
+        self.total_pixels = 0
+        self.frames = 0
+
+    def mark(self, rect):
+        rect = self.bounds.clip(rect)
+        if rect.width and rect.height:
+            self.rects.append(rect)
+
+    """
+        marks a rect given in the pixels of a surface that is drawn scaled up to the window
+            origin: where the surface's top left corner is drawn in the window
+            scale: window pixels per surface pixel
+    """
+    def mark_scaled(self, rect, origin, scale):
+        x1 = math.floor(origin[0] + rect[0] * scale)
+        y1 = math.floor(origin[1] + rect[1] * scale)
+        x2 = math.ceil(origin[0] + (rect[0] + rect[2]) * scale)
+        y2 = math.ceil(origin[1] + (rect[1] + rect[3]) * scale)
+        self.mark((x1, y1, x2 - x1, y2 - y1))
+
+    def mark_all(self):
+        self.full = True
+
+    # returns the rects to push with overlapping ones joined, so no pixel is pushed (or counted) twice
+    def merged(self):
+        rects = []
+        for rect in self.rects + self.last_rects:
+            rect = rect.copy()
+            i = 0
+            while i < len(rects):
+                if rect.colliderect(rects[i]):
+                    # the joined rect can reach others that were already checked, so start over
+                    rect.union_ip(rects.pop(i))
+                    i = 0
+                else:
+                    i += 1
+            rects.append(rect)
+        return rects
+
+    # sends the changed parts of the screen to the window, call once per frame instead of display.update()
+    def flush(self):
+        rects = None if self.full else self.merged()
+        pixels = self.bounds.width * self.bounds.height
+        if rects is not None:
+            changed = sum(rect.width * rect.height for rect in rects)
+            if changed <= pixels * FULL_UPDATE_FRACTION:
+                pixels = changed
+            else:
+                rects = None
+        if rects is None:
+            pygame.display.update()
+        elif rects:
+            pygame.display.update(rects)
+
+        self.pixels = pixels
+        self.total_pixels += pixels
+        self.frames += 1
+        self.last_rects = self.rects
+        self.rects = []
+        self.full = False
+        return pixels
+
+    # average pixels pushed per flush so far
+    def average_pixels(self):
+        return self.total_pixels / self.frames if self.frames else 0
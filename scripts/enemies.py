@@ -0,0 +1,151 @@
+import random
+
+import numpy as np
+
+
+# enemies further than this from the center of the camera, in pixels, sleep until it comes closer
+# (it has to be larger than half the diagonal of the display, only awake enemies are drawn)
+ENEMY_ACTIVE_RADIUS = 400
+# chance per step of an idle enemy starting to walk
+WALK_CHANCE = 0.01
+# range of steps an enemy walks for, inclusive
+WALK_STEPS = (30, 120)
+# distance in pixels from the middle of an enemy to the ledge check in front of it
+LEDGE_AHEAD = 7
+# distance in pixels from the top of an enemy to the ledge check below it
+LEDGE_BELOW = 23
+
+
+"""
+    The enemies of a level. Their AI state (walk countdown, facing, whether a wall stopped them)
+    lives in numpy arrays with one slot per enemy, like ParticleSystem, so deciding what every
+    enemy does in a step is a few array operations. Only enemies within ENEMY_ACTIVE_RADIUS of the
+    camera are stepped at all, the rest keep their state and pick up where they left off once the
+    camera comes back, so the cost of a step follows the enemies near the player instead of the level size.
+"""
+class EnemyGroup:
+    def __init__(self, game, capacity=32):
+        self.game = game
+        # number of enemies, they always occupy slots [0, count)
+        self.count = 0
+        self.enemies = []
+        self.pos = np.zeros((capacity, 2))
+        self.half_width = np.zeros(capacity, dtype=np.int32)
+        # steps left to walk for, 0 when standing still
+        self.walking = np.zeros(capacity, dtype=np.int32)
+        self.flip = np.zeros(capacity, dtype=bool)
+        # a wall was hit on the last step
+        self.blocked = np.zeros(capacity, dtype=bool)
+        # within ENEMY_ACTIVE_RADIUS of the camera on the last update
+        self.active = np.zeros(capacity, dtype=bool)
+        # seeded from the random module, so a run seeded with random.seed() plays out the same every time
+        self.rng = np.random.default_rng(random.getrandbits(64))
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return iter(self.enemies)
+
+    # makes sure there is a free slot, doubling the arrays when they run out
+    def reserve(self):
+        capacity = len(self.walking)
+        if self.count < capacity:
+            return
+        for name in ('pos', 'half_width', 'walking', 'flip', 'blocked', 'active'):
+            old = getattr(self, name)
+            new = np.zeros((capacity * 2,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, enemy):
+        self.reserve()
+        slot = self.count
+        enemy.slot = slot
+        self.enemies.append(enemy)
+        self.pos[slot] = enemy.pos
+        self.half_width[slot] = enemy.size[0] // 2
+        self.walking[slot] = 0
+        self.flip[slot] = enemy.flip
+        self.blocked[slot] = False
+        self.active[slot] = True
+        self.count += 1
+
+    # removes an enemy, the last enemy is moved into its slot
+    def remove(self, enemy):
+        slot = enemy.slot
+        last = self.count - 1
+        if slot != last:
+            moved = self.enemies[last]
+            self.enemies[slot] = moved
+            moved.slot = slot
+            for array in (self.pos, self.half_width, self.walking, self.flip, self.blocked, self.active):
+                array[slot] = array[last]
+        self.enemies.pop()
+        enemy.slot = None
+        self.count -= 1
+
+    def clear(self):
+        for enemy in self.enemies:
+            enemy.slot = None
+        self.enemies.clear()
+        self.count = 0
+
+    """
+        steps the AI and physics of the enemies near the camera whose ground is loaded
+            center: center of the camera in pixels
+    """
+    def update(self, tilemap, center):
+        n = self.count
+        if not n:
+            return
+        offset = self.pos[:n] - center
+        active = self.active[:n]
+        np.less((offset * offset).sum(axis=1), ENEMY_ACTIVE_RADIUS * ENEMY_ACTIVE_RADIUS, out=active)
+        # on a streamed map an enemy near the camera stays asleep until the ground under it is loaded,
+        # the same wait the player gets, otherwise it would fall through tiles that aren't there yet
+        awake = active
+        if self.game.streamer:
+            awake = active.copy()
+            for slot in np.flatnonzero(active).tolist():
+                if not self.game.ground_loaded(self.enemies[slot].rect().center):
+                    awake[slot] = False
+
+        walking = self.walking[:n]
+        flip = self.flip[:n]
+        walkers = awake & (walking > 0)
+        starters = awake & (walking == 0) & (self.rng.random(n) < WALK_CHANCE)
+
+        # the tile ahead of and below each walking enemy has to be solid for it to keep going,
+        # otherwise it turns around at the ledge, enemies that hit a wall turn around too
+        ahead = walkers & ~self.blocked[:n]
+        slots = np.flatnonzero(ahead)
+        if len(slots):
+            # the same point rect().centerx +-7 gives, pygame truncates the position
+            x = np.trunc(self.pos[slots, 0]) + self.half_width[slots] + np.where(flip[slots], -LEDGE_AHEAD, LEDGE_AHEAD)
+            tile_x = np.floor_divide(x, tilemap.tile_size).astype(np.int64).tolist()
+            tile_y = np.floor_divide(self.pos[slots, 1] + LEDGE_BELOW, tilemap.tile_size).astype(np.int64).tolist()
+            solid_at = tilemap.solid_at
+            ahead[slots] = [solid_at(tx, ty) != 0 for tx, ty in zip(tile_x, tile_y)]
+        flip ^= walkers & ~ahead
+        movement = np.where(ahead, np.where(flip, -0.5, 0.5), 0).tolist()
+
+        walking[walkers] -= 1
+        walking[starters] = self.rng.integers(WALK_STEPS[0], WALK_STEPS[1] + 1, size=int(starters.sum()))
+        # enemies shoot on the step they stop walking
+        stopped = walkers & (walking == 0)
+
+        for slot in np.flatnonzero(awake).tolist():
+            enemy = self.enemies[slot]
+            enemy.flip = bool(flip[slot])
+            if stopped[slot]:
+                enemy.shoot()
+            enemy.update(tilemap, (movement[slot], 0))
+            self.pos[slot] = enemy.pos
+            self.flip[slot] = enemy.flip
+            self.blocked[slot] = enemy.collisions['right'] or enemy.collisions['left']
+
+    # draws the awake enemies, the sleeping ones are too far away to be on screen
+    def render(self, surf, offset=(0, 0), outline=None, alpha=1):
+        for slot in np.flatnonzero(self.active[:self.count]).tolist():
+            self.enemies[slot].render(surf, offset=offset, outline=outline, alpha=alpha)
@@ -3,8 +3,8 @@ import random
 
 import pygame
 
-from scripts.particle import Particle
-from scripts.spark import Spark
+from scripts.surface_cache import transform_cache
+from scripts.utils import animation_clock
 
 
 # 4:10
@@ -16,6 +16,8 @@ class PhysicsEntity:
         self.game = game
         self.type = e_type
         self.pos = list(pos)  # every entity needs their own position list
+        # position before the last update, rendering blends from it towards pos
+        self.prev_pos = list(pos)
         # (l, w) tuple
         self.size = size
         # [x, y]
@@ -24,54 +26,61 @@ class PhysicsEntity:
         self.collisions = {'up': False, 'down': False, 'right': False, 'left': False}
 
         self.action = ''
+        # the clip being played (shared with every entity playing it) and the tick it started on
+        self.animation = None
+        self.anim_start = 0
 
         self.anim_offset = (-3, -3)
         self.flip = False  # enables to player to flip right or left
         self.set_action('idle')
 
         self.last_movement = [0, 0]
+        # handle of the entity in the game's entity_grid, None until it is added
+        self.grid_handle = None
+
     def rect(self):
         return pygame.Rect(self.pos[0], self.pos[1], self.size[0], self.size[1])
 
+    # adds the entity to a SpatialGrid or updates its rect there, call after it moves
+    def sync_grid(self, grid):
+        rect = (self.pos[0], self.pos[1], self.size[0], self.size[1])
+        if self.grid_handle is None or self.grid_handle not in grid:
+            self.grid_handle = grid.insert(self, rect)
+        else:
+            grid.move(self.grid_handle, rect)
+
     # used to define entity actions for the purpose of animation
     def set_action(self, action):
         if action != self.action:
             self.action = action
-            self.animation = self.game.assets[self.type + '/' + self.action].copy()
+            self.animation = self.game.assets[self.type + '/' + self.action]
+            self.anim_start = animation_clock.tick
 
     # Handles general collisions and movement of entities
     def update(self, tilemap, movement=(0, 0)):
+        self.prev_pos[0] = self.pos[0]
+        self.prev_pos[1] = self.pos[1]
         # collisions are initially set to false in each frame
-        self.collisions = {'up': False, 'down': False, 'right': False, 'left': False}
+        collisions = self.collisions
+        collisions['up'] = collisions['down'] = collisions['right'] = collisions['left'] = False
 
         # 0 = -x, 1 = + ( currently self.velocity is always 0
-        frame_movement = (movement[0] + self.velocity[0], movement[1] + self.velocity[1])
-
-        # x movement and collision handling
-        self.pos[0] += frame_movement[0]
-        entity_rect = self.rect()
-        for rect in tilemap.physics_rects_around(self.pos):
-            if entity_rect.colliderect(rect):
-                if frame_movement[0] > 0:  # collision right
-                    self.collisions['right'] = True
-                    entity_rect.right = rect.left
-                if frame_movement[0] < 0:  # collision left
-                    self.collisions['left'] = True
-                    entity_rect.left = rect.right
-                self.pos[0] = entity_rect.x
+        frame_movement_x = movement[0] + self.velocity[0]
+        frame_movement_y = movement[1] + self.velocity[1]
+
+        # x movement and collision handling, swept against the solid tiles so fast movement can't skip a wall
+        self.pos[0], side = tilemap.sweep_x(self.pos[0], self.pos[1], self.size[0], self.size[1], frame_movement_x)
+        if side > 0:  # collision right
+            collisions['right'] = True
+        elif side < 0:  # collision left
+            collisions['left'] = True
 
         # y movement and collision handling
-        self.pos[1] += frame_movement[1]
-        entity_rect = self.rect()
-        for rect in tilemap.physics_rects_around(self.pos):
-            if entity_rect.colliderect(rect):
-                if frame_movement[1] > 0:  # collision down
-                    self.collisions['down'] = True
-                    entity_rect.bottom = rect.top
-                if frame_movement[1] < 0:  # collision up
-                    self.collisions['up'] = True
-                    entity_rect.top = rect.bottom
-                self.pos[1] = entity_rect.y
+        self.pos[1], side = tilemap.sweep_y(self.pos[0], self.pos[1], self.size[0], self.size[1], frame_movement_y)
+        if side > 0:  # collision down
+            collisions['down'] = True
+        elif side < 0:  # collision up
+            collisions['up'] = True
 
         if movement[0] > 0:
             self.flip = False
@@ -85,52 +94,48 @@ class PhysicsEntity:
         if self.collisions['down'] or self.collisions['up']:
             self.velocity[1] = 0
 
-        self.animation.update()
-
-    def render(self, surf, offset=(0, 0)):
-        surf.blit(pygame.transform.flip(self.animation.img(), self.flip, False),
-                  (self.pos[0] - offset[0] + self.anim_offset[0], self.pos[1] - offset[1] + self.anim_offset[1]))
-
-
+    # returns the position to draw at, alpha blends between the last two updates (1 = current position)
+    def render_pos(self, alpha=1):
+        return (self.prev_pos[0] + (self.pos[0] - self.prev_pos[0]) * alpha,
+                self.prev_pos[1] + (self.pos[1] - self.prev_pos[1]) * alpha)
+
+    # outline: OutlineLayer that gets the silhouette of the entity, if given
+    def render(self, surf, offset=(0, 0), outline=None, alpha=1):
+        render_pos = self.render_pos(alpha)
+        pos = (render_pos[0] - offset[0] + self.anim_offset[0], render_pos[1] - offset[1] + self.anim_offset[1])
+        img = self.animation.img_at(animation_clock.tick - self.anim_start)
+        surf.blit(transform_cache.flip(img, self.flip), pos)
+        if outline:
+            outline.add(img, pos, self.flip)
+
+
+"""
+    Enemies walk back and forth along their platform and shoot at the player when they stop facing them.
+    Their AI (walk countdown, turning around, when to shoot) is run for all of them at once by
+    EnemyGroup in enemies.py, update() here is only the physics step of one enemy.
+"""
 class Enemy(PhysicsEntity):
     def __init__(self, game, pos, size):
         super().__init__(game, 'enemy', pos, size)
 
-        self.walking = 0
+        # slot of the enemy in its EnemyGroup
+        self.slot = None
+
+    # fires a projectile at the player if they can be seen
+    def shoot(self):
+        target = self.visible_target()
+        if target:
+            self.game.sfx['shoot'].play(0)
+            if self.flip:  # if the enemy is facing left, at the player
+                projectile = self.game.projectiles.spawn((self.rect().centerx - 7, self.rect().centery), -1.5)
+                for i in range(4):
+                    self.game.sparks.emit(projectile.pos, random.random() - 0.5 + math.pi, 2 + random.random())
+            else:  # if the enemy is facing right, at the player
+                projectile = self.game.projectiles.spawn((self.rect().centerx + 7, self.rect().centery), 1.5)
+                for i in range(4):
+                    self.game.sparks.emit(projectile.pos, random.random() - 0.5, 2 + random.random())
 
     def update(self, tilemap, movement=(0, 0)):
-        if self.walking:
-            # checks if there is a solid tile ahead + below the enemy
-            if (not self.collisions['right'] and not self.collisions['left']
-                    and tilemap.solid_check((self.rect().centerx + (-7 if self.flip else 7), self.pos[1] + 23))):
-                # subtract 0.5 if enemy is facing left and add 0.5 if enemy is facing right
-                movement = (movement[0] - 0.5 if self.flip else 0.5, movement[1])
-            else:
-                # turns enemy around
-                self.flip = not self.flip
-            self.walking = max(0, self.walking - 1)
-            # triggers on the first frame that the enemy stops in
-            if not self.walking:
-                # difference between player and enemy position
-                # if player is to the left of enemy distance[0] < 0
-                distance = (self.game.player.pos[0] - self.pos[0], self.game.player.pos[1] - self.pos[1])
-                if abs(distance[1]) < 16:
-                    if self.flip and distance[0] < 0:  # if the enemy is facing left, at the player
-                        self.game.sfx['shoot'].play(0)
-                        self.game.projectiles.append([[self.rect().centerx - 7, self.rect().centery], -1.5, 0])
-                        for i in range(4):
-                            self.game.sparks.append(Spark((self.game.projectiles[-1][0]), random.random() - 0.5 + math.pi, 2 + random.random()))
-                    if not self.flip and distance[0] > 0:  # if the enemy is facing right, at the player
-                        self.game.sfx['shoot'].play(0)
-                        self.game.projectiles.append([[self.rect().centerx + 7, self.rect().centery], 1.5, 0])
-                        for i in range(4):
-                            self.game.sparks.append(Spark((self.game.projectiles[-1][0]), random.random() - 0.5, 2 + random.random()))
-
-        # 1 in 100 chance of occuring, every frame
-        elif random.random() < 0.01:
-            # sets number of frames the enemy will continue to walk for
-            self.walking = random.randint(30, 120)
-
         super().update(tilemap, movement)
 
         if movement[0] != 0:
@@ -138,30 +143,55 @@ class Enemy(PhysicsEntity):
         else:
             self.set_action('idle')
 
-        # if player is currently dashing
-        if abs(self.game.player.dashing) >= 50:
-            if self.rect().colliderect(self.game.player.rect()):
-                self.game.screen_shake = max(16, self.game.screen_shake)
-                self.game.sfx['hit'].play(0)
-                for i in range(30):
-                    angle = random.random() * math.pi * 2  # random angle (0 -> 2pi)
-                    speed = random.random() * 5
-                    self.game.sparks.append(Spark(self.rect().center, angle, 2 + random.random()))
-                    self.game.particles.append(Particle(self.game, 'particle', self.rect().center, velocity=[math.cos(angle + math.pi) * speed * 0.5, math.sin(angle + math.pi) * speed * 0.5], frame=random.randint(0, 7)))
-                self.game.sparks.append(Spark(self.rect().center, 0, 5 + random.random()))
-                self.game.sparks.append(Spark(self.rect().center, math.pi, 5 + random.random()))
-                return True
-
-
-    def render(self, surf, offset=(0, 0)):
-        super().render(surf, offset)
-
+        self.sync_grid(self.game.entity_grid)
+
+    """
+        returns the player if it is in front of the enemy and on the same row, however far away it is,
+        there is only the one target so it's checked directly rather than through the entity grid
+    """
+    def visible_target(self):
+        player = self.game.player
+        # difference between player and enemy position
+        # if player is to the left of enemy distance[0] < 0
+        distance = (player.pos[0] - self.pos[0], player.pos[1] - self.pos[1])
+        if abs(distance[1]) < 16 and (distance[0] < 0 if self.flip else distance[0] > 0):
+            return player
+
+    # effects of the enemy being killed by a dash, the game removes it afterwards
+    def hit(self):
+        self.game.screen_shake = max(16, self.game.screen_shake)
+        self.game.sfx['hit'].play(0)
+        s_angles = []
+        s_speeds = []
+        p_velocities = []
+        p_frames = []
+        for i in range(30):
+            angle = random.random() * math.pi * 2  # random angle (0 -> 2pi)
+            speed = random.random() * 5
+            s_angles.append(angle)
+            s_speeds.append(2 + random.random())
+            p_velocities.append([math.cos(angle + math.pi) * speed * 0.5, math.sin(angle + math.pi) * speed * 0.5])
+            p_frames.append(random.randint(0, 7))
+        # two big sparks shooting out to the sides
+        s_angles += [0, math.pi]
+        s_speeds += [5 + random.random(), 5 + random.random()]
+        self.game.sparks.burst(self.rect().center, s_angles, s_speeds)
+        self.game.particles.burst('particle', self.rect().center, p_velocities, p_frames)
+
+    def render(self, surf, offset=(0, 0), outline=None, alpha=1):
+        super().render(surf, offset, outline, alpha)
+
+        # centre of the entity rect at the position it was just drawn at
+        render_pos = self.render_pos(alpha)
+        center = (int(render_pos[0]) + self.size[0] // 2, int(render_pos[1]) + self.size[1] // 2)
         if self.flip:
-            gun_pos = (self.rect().centerx - 4 - self.game.assets['gun'].get_width() - offset[0], self.rect().centery - offset[1])
-            surf.blit(pygame.transform.flip(self.game.assets['gun'], True, False), gun_pos)
+            gun_pos = (center[0] - 4 - self.game.assets['gun'].get_width() - offset[0], center[1] - offset[1])
+            surf.blit(transform_cache.flip(self.game.assets['gun'], True), gun_pos)
         else:
-            gun_pos = (self.rect().centerx + 4 - offset[0], self.rect().centery - offset[1])
+            gun_pos = (center[0] + 4 - offset[0], center[1] - offset[1])
             surf.blit(self.game.assets['gun'], gun_pos)
+        if outline:
+            outline.add(self.game.assets['gun'], gun_pos, self.flip)
 
 class Player(PhysicsEntity):
     def __init__(self, assets, game, pos, size):
@@ -208,13 +238,15 @@ class Player(PhysicsEntity):
                 self.set_action('idle')
 
         if abs(self.dashing) in {60, 50}:
+            p_velocities = []
+            p_frames = []
             for i in range(20):
                 # dash particle handling
                 angle = random.random() * math.pi * 2  # random angle
                 speed = random.random() * 0.5 + 0.5  # random value from 0.5 to 1
-                p_velocity = [math.cos(angle) * speed, math.sin(angle) * speed]  # memorize this formula
-                self.game.particles.append(Particle(self.game, 'particle', self.rect().center,
-                                                    velocity=p_velocity, frame=random.randint(0, 7)))
+                p_velocities.append([math.cos(angle) * speed, math.sin(angle) * speed])  # memorize this formula
+                p_frames.append(random.randint(0, 7))
+            self.game.particles.burst('particle', self.rect().center, p_velocities, p_frames)
 
         if self.dashing > 0:
             self.dashing = max(0, self.dashing - 1)
@@ -228,8 +260,7 @@ class Player(PhysicsEntity):
                 self.velocity[0] *= 0.1
                 # stream particle handling
             p_velocity = [abs(self.dashing) / self.dashing * random.random() * 3, 0]
-            self.game.particles.append(Particle(self.game, 'particle', self.rect().center,
-                                                velocity=p_velocity, frame=random.randint(0, 7)))
+            self.game.particles.emit('particle', self.rect().center, velocity=p_velocity, frame=random.randint(0, 7))
 
         # brings velocity towards zero if it does not equal zero
         if self.velocity[0] > 0:
@@ -239,10 +270,10 @@ class Player(PhysicsEntity):
             # to the left
             self.velocity[0] = min(self.velocity[0] + 0.1, 0)
 
-    def render(self, surf, offset=(0, 0)):
+    def render(self, surf, offset=(0, 0), outline=None, alpha=1):
         # if dash on cooldown
         if abs(self.dashing) <= 50:
-            super().render(surf, offset=offset)
+            super().render(surf, offset=offset, outline=outline, alpha=alpha)
 
     def jump(self):
         if self.wall_slide:
@@ -0,0 +1,196 @@
+"""
+    Binary map format, an alternative to map.json that loads straight into tilemap chunks.
+
+    version 1 layout, little endian:
+        header          HEADER (magic, version, flags, tile size, type count, chunk count, offgrid count)
+        string table    one (length byte, utf-8 name) per tile type, type id 1 is the first name
+        body            chunk records then offgrid records, zlib compressed if FLAG_ZLIB is set
+
+    a chunk record is the chunk coordinate followed by the chunk's 256 type ids and 256 variants,
+    the same bytes a TileChunk holds, so loading a chunk is one copy instead of one dict per tile.
+    an offgrid record is a pixel position, a type id, a variant and flags.
+
+    Convert between formats with:  python -m scripts.mapfile map.json map.tmap [--zlib]
+                                    python -m scripts.mapfile map.tmap map.json
+"""
+import mmap
+import struct
+import sys
+import zlib
+
+from scripts.chunk import TileChunk, CHUNK_SIZE, EMPTY
+
+MAGIC = b'TMAP'
+VERSION = 1
+MAP_EXTENSION = '.tmap'
+# the body after the string table is zlib compressed
+FLAG_ZLIB = 1
+# offgrid record flag, the position was stored as whole numbers (keeps ints ints when converting back to json)
+OFFGRID_INT_POS = 1
+
+HEADER = struct.Struct('<4sHHHHII')
+CHUNK_HEAD = struct.Struct('<ii')
+CHUNK_CELLS = CHUNK_SIZE * CHUNK_SIZE
+CHUNK_RECORD_SIZE = CHUNK_HEAD.size + CHUNK_CELLS * 2
+OFFGRID_RECORD = struct.Struct('<ddHBB')
+
+
+"""
+    returns the type names written to a file for a tilemap and some offgrid tiles, grid type ids
+    are kept as they are so chunk bytes can be written unchanged, offgrid types are added after them
+"""
+def type_table(tilemap, offgrid):
+    names = tilemap.type_names[1:]
+    ids = {name: i + 1 for i, name in enumerate(names)}
+    for tile in offgrid:
+        if tile['type'] not in ids:
+            names.append(tile['type'])
+            ids[tile['type']] = len(names)
+    if len(names) > 255:
+        raise ValueError('the binary map format supports at most 255 tile types')
+    return names, ids
+
+
+"""
+    returns the bytes of a map file holding the given chunks and offgrid tiles
+        compress: zlib the body, smaller files (sparse chunks shrink a lot) but it can't be mapped in place
+"""
+def encode_map(tilemap, chunks, offgrid, compress=False):
+    names, ids = type_table(tilemap, offgrid)
+    body = []
+    for chunk in chunks:
+        body.append(CHUNK_HEAD.pack(chunk.pos[0], chunk.pos[1]))
+        body.append(bytes(chunk.types))
+        body.append(bytes(chunk.variants))
+    for tile in offgrid:
+        x, y = tile['pos']
+        flags = OFFGRID_INT_POS if isinstance(x, int) and isinstance(y, int) else 0
+        body.append(OFFGRID_RECORD.pack(x, y, ids[tile['type']], tile['variant'], flags))
+    body = b''.join(body)
+
+    data = [HEADER.pack(MAGIC, VERSION, FLAG_ZLIB if compress else 0, tilemap.tile_size, len(names), len(chunks), len(offgrid))]
+    for name in names:
+        encoded = name.encode('utf-8')
+        data.append(bytes([len(encoded)]) + encoded)
+    data.append(zlib.compress(body) if compress else body)
+    return b''.join(data)
+
+
+# writes every tile of a tilemap to path in the binary format
+def write_map(tilemap, path, compress=False):
+    f = open(path, 'wb')
+    f.write(encode_map(tilemap, [tilemap.chunks[key] for key in sorted(tilemap.chunks)], list(tilemap.offgrid_tiles), compress))
+    f.close()
+
+
+"""
+    parses a map file held in a bytes like object (bytes or an mmap), returns
+    (tile size, type names, [(chunk key, type bytes, variant bytes)], offgrid tiles)
+    where names[0] is None and the type bytes are ids into names
+"""
+def decode_map(data, path=''):
+    magic, version, flags, tile_size, type_count, chunk_count, offgrid_count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError('%s is not a binary map file' % path)
+    if version != VERSION:
+        raise ValueError('%s has map format version %d, only version %d is supported' % (path, version, VERSION))
+
+    offset = HEADER.size
+    names = [None]
+    for i in range(type_count):
+        length = data[offset]
+        names.append(bytes(data[offset + 1:offset + 1 + length]).decode('utf-8'))
+        offset += 1 + length
+
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(data[offset:])
+        offset = 0
+    else:
+        body = data
+    # a cut off file would otherwise give short chunk records
+    if len(body) < offset + chunk_count * CHUNK_RECORD_SIZE + offgrid_count * OFFGRID_RECORD.size:
+        raise ValueError('%s is truncated' % path)
+
+    records = []
+    for i in range(chunk_count):
+        key = CHUNK_HEAD.unpack_from(body, offset)
+        start = offset + CHUNK_HEAD.size
+        records.append((key, body[start:start + CHUNK_CELLS], body[start + CHUNK_CELLS:start + CHUNK_CELLS * 2]))
+        offset += CHUNK_RECORD_SIZE
+
+    offgrid = []
+    for i in range(offgrid_count):
+        x, y, type_index, variant, tile_flags = OFFGRID_RECORD.unpack_from(body, offset)
+        if tile_flags & OFFGRID_INT_POS:
+            x, y = int(x), int(y)
+        offgrid.append({'type': names[type_index], 'variant': variant, 'pos': [x, y]})
+        offset += OFFGRID_RECORD.size
+    return tile_size, names, records, offgrid
+
+
+"""
+    turns decoded chunk records into TileChunks that use the tilemap's type ids, returns {key: chunk}
+    (the ids are remapped with bytes.translate, so a whole chunk is remapped at once)
+"""
+def build_chunks(tilemap, names, records):
+    table = bytearray(256)
+    for i in range(1, len(names)):
+        table[i] = tilemap.type_id(names[i])
+    chunks = {}
+    for key, types, variants in records:
+        chunk = TileChunk(key)
+        chunk.types[:] = types.translate(table)
+        chunk.variants[:] = variants
+        chunk.count = CHUNK_CELLS - chunk.types.count(EMPTY)
+        if chunk.count:
+            chunks[key] = chunk
+    return chunks
+
+
+# reads a map file through mmap, returns the same as decode_map
+def read_map_file(path):
+    f = open(path, 'rb')
+    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return decode_map(data, path)
+    finally:
+        data.close()
+        f.close()
+
+
+# replaces the tiles of a tilemap with the ones in a binary map file
+def read_map(tilemap, path):
+    tile_size, names, records, offgrid = read_map_file(path)
+    tilemap.tile_size = tile_size
+    tilemap.chunks = build_chunks(tilemap, names, records)
+    tilemap.chunk_surfaces.clear()
+    tilemap.offgrid_tiles.clear()
+    for tile in offgrid:
+        tilemap.add_offgrid(tile)
+
+
+# converts a map between map.json and the binary format, the format of each file is picked by its extension
+def convert(source, destination, compress=False):
+    from scripts.tilemap import Tilemap
+
+    tilemap = Tilemap(None)
+    tilemap.load(source)
+    if destination.endswith(MAP_EXTENSION):
+        write_map(tilemap, destination, compress)
+    else:
+        tilemap.save(destination)
+
+
+def main(argv=None):
+    args = sys.argv[1:] if argv is None else argv
+    compress = '--zlib' in args
+    paths = [arg for arg in args if arg != '--zlib']
+    if len(paths) != 2:
+        print('usage: python -m scripts.mapfile SOURCE DESTINATION [--zlib]')
+        return 1
+    convert(paths[0], paths[1], compress)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import pygame
+
+from scripts.surface_cache import transform_cache
+
+# colour of the shadow drawn around everything on the display surface
+SILHOUETTE_COLOR = (0, 0, 0, 180)
+# the silhouette is drawn once per offset, which makes a 1 pixel outline
+OUTLINE_OFFSETS = [(-1, 0), (0, -1), (1, 0), (0, 1)]
+
+
+# returns a surface that is SILHOUETTE_COLOR wherever the given surface has a visible pixel
+def make_silhouette(surf):
+    return pygame.mask.from_surface(surf).to_surface(setcolor=SILHOUETTE_COLOR, unsetcolor=(0, 0, 0, 0))
+
+
+"""
+    Builds the outline of everything drawn on a frame out of silhouettes that are worked
+    out once per image, instead of masking the whole display every frame.
+    Silhouettes are merged with BLEND_RGBA_MAX, so overlapping objects produce the same
+    single layer of shadow that one mask of the whole display did.
+    The silhouettes are kept in transform_cache with the other surfaces made from images,
+    so they count against its memory budget and the least used ones are dropped.
+"""
+class OutlineLayer:
+    def __init__(self, size):
+        self.surf = pygame.Surface(size, pygame.SRCALPHA)
+
+    def clear(self):
+        self.surf.fill((0, 0, 0, 0))
+
+    def silhouette(self, img, flip=False):
+        return transform_cache.get((img, 'silhouette', bool(flip)), lambda: make_silhouette(transform_cache.flip(img, flip)))
+
+    # adds the silhouette of an image that was drawn at pos
+    def add(self, img, pos, flip=False):
+        self.surf.blit(self.silhouette(img, flip), pos, special_flags=pygame.BLEND_RGBA_MAX)
+
+    # adds an already made silhouette, used for surfaces that aren't kept forever like tilemap chunks
+    def add_silhouette(self, silhouette, pos):
+        self.surf.blit(silhouette, pos, special_flags=pygame.BLEND_RGBA_MAX)
+
+    def render(self, surf):
+        for offset in OUTLINE_OFFSETS:
+            surf.blit(self.surf, offset)
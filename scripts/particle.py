@@ -1,33 +1,141 @@
+import numpy as np
+
+
 """
-    Particle class to represent temporary, small animations on screen
+    Particle system to represent temporary, small animations on screen.
+    Every particle lives in a slot of a set of numpy arrays (struct of arrays) so the
+    whole system is updated in one vectorized step instead of one object per particle.
 """
-class Particle:
-    def __init__(self, game, p_type, pos, velocity=[0, 0], frame=0):
+class ParticleSystem:
+    def __init__(self, game, capacity=256):
         self.game = game
-        self.type = p_type
-        self.pos = list(pos)
-        self.velocity = list(velocity)
-        self.animation = self.game.assets['particle/' + p_type].copy()
-        self.animation.frame = frame
+        # most live at once, enough capacity up front for this many means no array ever gets regrown
+        self.high_water = 0
+        # number of live particles, they always occupy slots [0, count)
+        self.count = 0
+        # particles in [0, updated) have been through an update, anything after that was emitted since
+        self.updated = 0
+        self.pos = np.zeros((capacity, 2))
+        self.velocity = np.zeros((capacity, 2))
+        self.frame = np.zeros(capacity, dtype=np.int32)
+        self.type = np.zeros(capacity, dtype=np.int32)
+        # animation has reached its last frame
+        self.done = np.zeros(capacity, dtype=bool)
+        # particle was done before the last update, it gets drawn one final time and removed on the next update
+        self.dead = np.zeros(capacity, dtype=bool)
+
+        # per type tables, indexed by type id
+        self.type_ids = {}
+        self.type_names = []
+        self.img_duration = np.zeros(0, dtype=np.int32)
+        self.total_frames = np.zeros(0, dtype=np.int32)
+        self.loop = np.zeros(0, dtype=bool)
+        self.image_base = np.zeros(0, dtype=np.int32)
+        # the images of every type one after another, image_base[type] is where a type's images start
+        self.images = []
+        self.half_sizes = np.zeros((0, 2))
+
+    def __len__(self):
+        return self.count
+
+    # returns the id of a particle type, reading its animation from the game assets the first time
+    def type_id(self, p_type):
+        if p_type not in self.type_ids:
+            animation = self.game.assets['particle/' + p_type]
+            self.type_ids[p_type] = len(self.type_names)
+            self.type_names.append(p_type)
+            self.img_duration = np.append(self.img_duration, animation.img_duration)
+            self.total_frames = np.append(self.total_frames, animation.img_duration * len(animation.images))
+            self.loop = np.append(self.loop, animation.loop)
+            self.image_base = np.append(self.image_base, len(self.images))
+            self.images.extend(animation.images)
+            self.half_sizes = np.concatenate([self.half_sizes, [(img.get_width() // 2, img.get_height() // 2) for img in animation.images]])
+        return self.type_ids[p_type]
+
+    # makes sure there are at least amount free slots, doubling the arrays when they run out
+    def reserve(self, amount):
+        self.high_water = max(self.high_water, self.count + amount)
+        capacity = len(self.frame)
+        if self.count + amount <= capacity:
+            return
+        while capacity < self.count + amount:
+            capacity *= 2
+        for name in ('pos', 'velocity', 'frame', 'type', 'done', 'dead'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def emit(self, p_type, pos, velocity=(0, 0), frame=0):
+        self.burst(p_type, pos, [velocity], [frame])
+
+    """
+        adds one particle per velocity, all starting at pos
+            frames: starting animation frame of each particle
+    """
+    def burst(self, p_type, pos, velocities, frames):
+        amount = len(velocities)
+        if not amount:
+            return
+        type_id = self.type_id(p_type)
+        self.reserve(amount)
+        start, end = self.count, self.count + amount
+        self.pos[start:end] = pos
+        self.velocity[start:end] = velocities
+        self.frame[start:end] = frames
+        self.type[start:end] = type_id
+        self.done[start:end] = False
+        self.dead[start:end] = False
+        self.count = end
+
+    def clear(self):
+        self.count = 0
+        self.updated = 0
 
     """
-        returns true if the particle animation is complete and false otherwise
+        moves and animates every particle, particles whose animation was already
+        complete on the previous update are removed by compacting the arrays
     """
     def update(self):
-        kill = False
-        if self.animation.done:
-            kill = True
+        n = self.count
+        if not n:
+            return
 
-        self.pos[0] += self.velocity[0]
-        self.pos[1] += self.velocity[1]
+        # leaves sway side to side as they fall, starting after their first update
+        if 'leaf' in self.type_ids:
+            m = self.updated
+            leaves = self.type[:m] == self.type_ids['leaf']
+            self.pos[:m, 0][leaves] += np.sin(self.frame[:m][leaves] * 0.035) * 0.3
 
-        self.animation.update()
+        dead = self.dead[:n]
+        if dead.any():
+            keep = ~dead
+            n = int(keep.sum())
+            for array in (self.pos, self.velocity, self.frame, self.type, self.done):
+                array[:n] = array[:self.count][keep]
+            self.count = n
 
-        return kill
+        types = self.type[:n]
+        total = self.total_frames[types]
+        loop = self.loop[types]
+        self.dead[:n] = self.done[:n]
+        self.pos[:n] += self.velocity[:n]
+        frame = (self.frame[:n] + 1) % total
+        # non looping animations hold their final frame
+        frame = np.where(loop, frame, np.minimum(frame, total - 1))
+        self.frame[:n] = frame
+        self.done[:n] |= ~loop & (frame >= total - 1)
+        self.updated = n
 
     """
-        renders frame of particle animation on given surface
+        renders every particle on the given surface in a single blits call
     """
     def render(self, surf, offset=(0, 0)):
-        img = self.animation.img()
-        surf.blit(img, (self.pos[0] - offset[0] - img.get_width() // 2, self.pos[1] - offset[1] - img.get_height() // 2))
+        n = self.count
+        if not n:
+            return
+        types = self.type[:n]
+        image_index = self.image_base[types] + self.frame[:n] // self.img_duration[types]
+        dest = self.pos[:n] - offset - self.half_sizes[image_index]
+        images = self.images
+        surf.blits([(images[i], (x, y)) for i, (x, y) in zip(image_index.tolist(), dest.tolist())], doreturn=False)
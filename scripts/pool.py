@@ -0,0 +1,33 @@
+"""
+    Free list of objects that get reused instead of built again, for short lived objects gameplay
+    makes every few frames like projectiles. acquire() hands out a free object or makes a new one
+    with factory when there are none, release() gives it back, whoever acquires an object sets
+    every field it uses. high_water is the most objects out at once,
+    which is how many a pool needs up front for a level not to allocate any.
+"""
+class Pool:
+    def __init__(self, factory, size=0):
+        self.factory = factory
+        self.free = [factory() for i in range(size)]
+        # objects made so far, including the ones made up front
+        self.created = size
+        self.in_use = 0
+        self.high_water = 0
+
+    def acquire(self):
+        if self.free:
+            obj = self.free.pop()
+        else:
+            obj = self.factory()
+            self.created += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return obj
+
+    def release(self, obj):
+        self.in_use -= 1
+        self.free.append(obj)
+
+    def stats(self):
+        return {'in_use': self.in_use, 'high_water': self.high_water, 'created': self.created}
@@ -0,0 +1,102 @@
+import math
+
+import pygame
+
+# scaling functions by name, called as filter(source, size, dest_surface)
+# another filter can be added here and picked by its name
+FILTERS = {
+    'nearest': pygame.transform.scale,
+    'smooth': pygame.transform.smoothscale,
+}
+
+
+"""
+    Draws a small surface (the game's display) scaled up onto the window without making a new
+    surface every frame. The source is scaled to the target's size times zoom and centered on it,
+    but only the source pixels that land inside the target are scaled, so zooming in scales the
+    same window sized area instead of an ever bigger image that is mostly thrown away.
+    Everything it scales into is kept between frames and only made again when the zoom changes:
+        integer factor  the visible source pixels are scaled straight into the part of the target
+                        they cover, no extra surface or blit (zoom 1 on a 2x window, zoom 2 ...)
+        otherwise       they are scaled into a kept buffer which is blitted onto the target
+    opaque: the source never has see through pixels, so writing it straight into the target looks
+            the same as blitting it. If it can be see through, or its pixels are laid out differently
+            from the target's, the integer case uses the buffer too.
+"""
+class Presenter:
+    def __init__(self, target, filter='nearest', opaque=False):
+        self.target = target
+        self.filter = FILTERS[filter]
+        self.opaque = opaque
+
+        # what the last present() worked out, used again while the source and zoom stay the same
+        self.key = None
+        self.source_area = None
+        self.dest = None
+        self.dest_pos = None
+        self.rect = None
+        self.buffer = None
+
+        # how many pixels the last present() scaled
+        self.pixels = 0
+
+    # changes the filter, takes a name from FILTERS
+    def set_filter(self, filter):
+        self.filter = FILTERS[filter]
+
+    """
+        scales source onto the target
+            zoom: 1 fills the target, 2 is twice as big and shows the middle quarter of source...
+        returns the rect the whole scaled source covers on the target (mostly off it when zoomed),
+        so things on source can be placed on the target with its topleft and width
+    """
+    def present(self, source, zoom=1):
+        key = (source, source.get_size(), zoom)
+        if key != self.key:
+            self.prepare(source, zoom)
+            self.key = key
+        self.filter(self.source_area, self.dest.get_size(), self.dest)
+        if self.dest_pos is not None:
+            self.target.blit(self.dest, self.dest_pos)
+        return self.rect
+
+    # scaling copies pixels as they are, only a blit converts them, so writing straight into the
+    # target needs the same depth and colour channels in the same places (alpha doesn't matter when opaque)
+    def same_format(self, source):
+        return source.get_bitsize() == self.target.get_bitsize() and source.get_masks()[:3] == self.target.get_masks()[:3]
+
+    # works out which part of source is visible and what it's scaled into for this zoom
+    def prepare(self, source, zoom):
+        sw, sh = source.get_size()
+        tw, th = self.target.get_size()
+        self.rect = pygame.Rect(0, 0, int(tw * zoom), int(th * zoom))
+        self.rect.center = (tw // 2, th // 2)
+        # target pixels per source pixel
+        scale_x = self.rect.width / sw
+        scale_y = self.rect.height / sh
+
+        # source pixels that are at least partly inside the target
+        x1 = max(0, math.floor(-self.rect.x / scale_x))
+        y1 = max(0, math.floor(-self.rect.y / scale_y))
+        x2 = min(sw, math.ceil((tw - self.rect.x) / scale_x))
+        y2 = min(sh, math.ceil((th - self.rect.y) / scale_y))
+        self.source_area = source.subsurface((x1, y1, x2 - x1, y2 - y1))
+
+        # where those source pixels land on the target, the edges of a partly visible pixel hang off it
+        left = self.rect.x + math.floor(x1 * scale_x)
+        top = self.rect.y + math.floor(y1 * scale_y)
+        area = pygame.Rect(left, top, self.rect.x + math.floor(x2 * scale_x) - left, self.rect.y + math.floor(y2 * scale_y) - top)
+        self.pixels = area.width * area.height
+
+        integer = scale_x == int(scale_x) and scale_y == int(scale_y)
+        if integer and self.opaque and self.same_format(source) and self.target.get_rect().contains(area):
+            self.dest = self.target.subsurface(area)
+            self.dest_pos = None
+            return
+        # the buffer has the source's format so scaling into it never needs a conversion, the blit does that,
+        # it's only made again when it has to get bigger or the source's format changes
+        if (self.buffer is None or self.buffer.get_width() < area.width or self.buffer.get_height() < area.height
+                or self.buffer.get_bitsize() != source.get_bitsize() or self.buffer.get_masks() != source.get_masks()):
+            self.buffer = pygame.Surface(area.size, source.get_flags() & pygame.SRCALPHA, source)
+        self.dest = self.buffer.subsurface((0, 0, area.width, area.height))
+        self.dest_pos = area.topleft
@@ -0,0 +1,119 @@
+import time
+from array import array
+
+import pygame
+
+# time budget of one frame at 60 fps, in milliseconds
+FRAME_BUDGET_MS = 1000 / 60
+# colours cycled through by the overlay bars
+BAR_COLORS = [(230, 80, 80), (240, 170, 60), (230, 220, 80), (110, 210, 100), (80, 200, 210), (90, 130, 240), (170, 100, 230), (230, 110, 180)]
+
+
+"""
+    Times the named phases of every frame into a fixed size ring buffer.
+    The game loop calls begin_frame() at the top and end_phase(name) after each phase,
+    so each phase is timed from the end of the one before it.
+    While disabled every call returns straight away.
+"""
+class FrameProfiler:
+    def __init__(self, history=240):
+        self.enabled = False
+        # only true between begin_frame() and the end of that frame, so toggling mid frame doesn't record half a frame
+        self.in_frame = False
+        self.show_overlay = False
+        # number of frames kept, older ones are overwritten
+        self.history = history
+        # phase names in the order they were first seen
+        self.phases = []
+        # phase name -> milliseconds spent in that phase, one slot per frame
+        self.samples = {}
+        # slot of the frame being recorded and how many frames have been recorded in total
+        self.cursor = 0
+        self.frames = 0
+        self.last_mark = 0
+        # name -> value of the last frame, listed under the phases (pixels pushed to the window and the like)
+        self.counters = {}
+        self.font = None
+        self.background = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.in_frame = False
+        self.show_overlay = self.enabled
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.cursor = self.frames % self.history
+        for samples in self.samples.values():
+            samples[self.cursor] = 0
+        self.frames += 1
+        self.in_frame = True
+        self.last_mark = time.perf_counter()
+
+    # ends the current phase, everything since the last mark is counted towards name
+    def end_phase(self, name):
+        if not self.in_frame:
+            return
+        now = time.perf_counter()
+        if name not in self.samples:
+            self.phases.append(name)
+            self.samples[name] = array('d', [0.0]) * self.history
+        self.samples[name][self.cursor] += (now - self.last_mark) * 1000
+        self.last_mark = now
+
+    def count(self, name, value):
+        if self.enabled:
+            self.counters[name] = value
+
+    # returns the slots of the last count recorded frames, oldest first
+    def recent_slots(self, count=None):
+        recorded = min(self.frames, self.history)
+        count = recorded if count is None else min(count, recorded)
+        return [(self.frames - count + i) % self.history for i in range(count)]
+
+    # average milliseconds per phase over the last count frames
+    def averages(self, count=60):
+        slots = self.recent_slots(count)
+        return {name: sum(self.samples[name][slot] for slot in slots) / max(1, len(slots)) for name in self.phases}
+
+    """
+        writes the last count frames to a csv file, one row per frame and one column per phase
+    """
+    def export_csv(self, path, count=None):
+        slots = self.recent_slots(count)
+        f = open(path, 'w')
+        f.write(','.join(['frame'] + self.phases + ['total']) + '\n')
+        for i, slot in enumerate(slots):
+            row = [self.samples[name][slot] for name in self.phases]
+            f.write(','.join([str(self.frames - len(slots) + i)] + ['%.4f' % ms for ms in row] + ['%.4f' % sum(row)]) + '\n')
+        f.close()
+
+    """
+        draws one bar per phase, a full width bar is a whole 60 fps frame,
+        returns the rect drawn over or None when the overlay is hidden
+    """
+    def render(self, surf, pos=(5, 5), width=200):
+        if not self.show_overlay:
+            return None
+        if self.font is None:
+            self.font = pygame.font.SysFont('consolas', 12)
+        averages = self.averages()
+        row_height = self.font.get_linesize()
+        size = (width + 150, row_height * (len(averages) + len(self.counters) + 1) + 4)
+        if self.background is None or self.background.get_size() != size:
+            self.background = pygame.Surface(size, pygame.SRCALPHA)
+            self.background.fill((0, 0, 0, 160))
+        surf.blit(self.background, pos)
+        y = pos[1] + 2
+        for i, name in enumerate(self.phases):
+            ms = averages[name]
+            pygame.draw.rect(surf, BAR_COLORS[i % len(BAR_COLORS)], (pos[0] + 150, y + 2, min(width, width * ms / FRAME_BUDGET_MS), row_height - 4))
+            surf.blit(self.font.render('%-12s %6.2f ms' % (name, ms), False, (255, 255, 255)), (pos[0] + 4, y))
+            y += row_height
+        total = sum(averages.values())
+        surf.blit(self.font.render('%-12s %6.2f ms' % ('total', total), False, (255, 255, 255)), (pos[0] + 4, y))
+        for name, value in self.counters.items():
+            y += row_height
+            surf.blit(self.font.render('%-12s %9d' % (name, value), False, (255, 255, 255)), (pos[0] + 4, y))
+        return pygame.Rect(pos, size)
@@ -0,0 +1,71 @@
+from scripts.pool import Pool
+
+# steps a projectile flies for before it is removed
+PROJECTILE_LIFETIME = 360
+
+
+class Projectile:
+    __slots__ = ('pos', 'direction', 'timer')
+
+    def __init__(self):
+        # [x, y], kept for the life of the object so spawning doesn't make a new list
+        self.pos = [0, 0]
+        # pixels moved along x per step, negative flies left
+        self.direction = 0
+        # steps since it was fired
+        self.timer = 0
+
+
+"""
+    The enemy projectiles in flight. Projectile objects come out of a Pool and go back into it
+    when they hit a wall, time out or hit the player, so a level of shooting reuses the same few.
+"""
+class ProjectilePool:
+    def __init__(self, size=16):
+        self.pool = Pool(Projectile, size)
+        self.live = []
+
+    def __len__(self):
+        return len(self.live)
+
+    def __iter__(self):
+        return iter(self.live)
+
+    def spawn(self, pos, direction):
+        projectile = self.pool.acquire()
+        projectile.pos[0] = pos[0]
+        projectile.pos[1] = pos[1]
+        projectile.direction = direction
+        projectile.timer = 0
+        self.live.append(projectile)
+        return projectile
+
+    def clear(self):
+        for projectile in self.live:
+            self.pool.release(projectile)
+        self.live.clear()
+
+    """
+        moves every projectile a step, projectiles that reach a solid tile or run out of time are removed
+        and so is the first one that ends up inside target (a rect, or None), returns True if one hit target
+        (one hit kills the player, the projectiles after it fly on)
+    """
+    def update(self, tilemap, target=None):
+        hit = False
+        kept = 0
+        live = self.live
+        for projectile in live:
+            projectile.pos[0] += projectile.direction
+            projectile.timer += 1
+            if tilemap.solid_check(projectile.pos) or projectile.timer > PROJECTILE_LIFETIME:
+                self.pool.release(projectile)
+            elif target is not None and target.collidepoint(projectile.pos):
+                self.pool.release(projectile)
+                hit = True
+                target = None
+            else:
+                # the projectiles that stay are packed to the front of the list in order
+                live[kept] = projectile
+                kept += 1
+        del live[kept:]
+        return hit
@@ -0,0 +1,67 @@
+"""
+    Scenes are the screens of the game (title, controls, gameplay, pause) kept on a stack.
+    Game.run is the only loop, it calls frame() on whatever scene is on top until the stack is empty,
+    so moving between screens never nests loops or leaves old ones waiting underneath.
+"""
+
+
+"""
+    Base class for a screen. A scene is told when it starts and stops being the top of the stack:
+        enter()     pushed onto the stack
+        exit()      popped off the stack, anything it holds on to should be let go here
+        pause()     another scene was pushed on top of it
+        resume()    the scene on top of it was popped
+    frame() handles input, updates and draws one frame, it runs once per pass of the game loop.
+"""
+class Scene:
+    def __init__(self, game):
+        self.game = game
+
+    def enter(self):
+        pass
+
+    def exit(self):
+        pass
+
+    def pause(self):
+        pass
+
+    def resume(self):
+        pass
+
+    def frame(self):
+        pass
+
+
+class SceneStack:
+    def __init__(self):
+        self.scenes = []
+
+    def __len__(self):
+        return len(self.scenes)
+
+    def top(self):
+        return self.scenes[-1] if self.scenes else None
+
+    def push(self, scene):
+        if self.scenes:
+            self.scenes[-1].pause()
+        self.scenes.append(scene)
+        scene.enter()
+
+    def pop(self):
+        scene = self.scenes.pop()
+        scene.exit()
+        if self.scenes:
+            self.scenes[-1].resume()
+        return scene
+
+    # empties the stack and starts over from scene
+    def switch(self, scene):
+        self.clear()
+        self.push(scene)
+
+    # exits every scene from the top down, the game loop stops once the stack is empty
+    def clear(self):
+        while self.scenes:
+            self.scenes.pop().exit()
@@ -2,31 +2,113 @@
 # cartesian = (x, y)  polar = (r, a)
 import math
 
+import numpy as np
 import pygame.draw
 
 
-class Spark:
-    def __init__(self, pos, angle, speed):
-        # position represents cartesian tuple
-        self.pos = list(pos)
-        # angle and speed represent components of polar coords
-        self.angle = angle
-        self.speed = speed
+"""
+    Pool of sparks stored as numpy arrays. The direction of a spark never changes, so
+    cos/sin of its angle are worked out once when it is emitted and reused every frame.
+"""
+class SparkSystem:
+    def __init__(self, capacity=128):
+        # most live at once, enough capacity up front for this many means no array ever gets regrown
+        self.high_water = 0
+        # number of live sparks, they always occupy slots [0, count)
+        self.count = 0
+        self.pos = np.zeros((capacity, 2))
+        # (cos(angle), sin(angle)) of each spark
+        self.direction = np.zeros((capacity, 2))
+        self.speed = np.zeros(capacity)
+        # spark stopped on the last update, it gets drawn one final time and its slot is reused on the next update
+        self.dead = np.zeros(capacity, dtype=bool)
+
+    def __len__(self):
+        return self.count
+
+    # makes sure there are at least amount free slots, doubling the arrays when they run out
+    def reserve(self, amount):
+        self.high_water = max(self.high_water, self.count + amount)
+        capacity = len(self.speed)
+        if self.count + amount <= capacity:
+            return
+        while capacity < self.count + amount:
+            capacity *= 2
+        for name in ('pos', 'direction', 'speed', 'dead'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def emit(self, pos, angle, speed):
+        self.reserve(1)
+        i = self.count
+        self.pos[i] = pos
+        self.direction[i] = (math.cos(angle), math.sin(angle))
+        self.speed[i] = speed
+        self.dead[i] = False
+        self.count += 1
+
+    """
+        adds one spark per angle, all starting at pos
+            speeds: starting speed of each spark
+    """
+    def burst(self, pos, angles, speeds):
+        amount = len(angles)
+        if not amount:
+            return
+        self.reserve(amount)
+        start, end = self.count, self.count + amount
+        angles = np.asarray(angles, dtype=float)
+        self.pos[start:end] = pos
+        self.direction[start:end, 0] = np.cos(angles)
+        self.direction[start:end, 1] = np.sin(angles)
+        self.speed[start:end] = speeds
+        self.dead[start:end] = False
+        self.count = end
+
+    def clear(self):
+        self.count = 0
 
     def update(self):
-        self.pos[0] += math.cos(self.angle) * self.speed
-        self.pos[1] += math.sin(self.angle) * self.speed
+        n = self.count
+        if not n:
+            return
+
+        dead = self.dead[:n]
+        if dead.any():
+            # live sparks are packed to the front so the freed slots get reused by the next emit
+            keep = ~dead
+            n = int(keep.sum())
+            for array in (self.pos, self.direction, self.speed):
+                array[:n] = array[:self.count][keep]
+            self.count = n
+
+        self.pos[:n] += self.direction[:n] * self.speed[:n, None]
         # slows sparks down to 0
-        self.speed = max(0, self.speed - 0.1)
+        self.speed[:n] = np.maximum(0, self.speed[:n] - 0.1)
+        self.dead[:n] = self.speed[:n] == 0
 
-        return not self.speed
+    """
+        returns a (count, 4, 2) array with the polygon of every spark, already offset
+    """
+    def polygons(self, offset=(0, 0)):
+        n = self.count
+        pos = self.pos[:n] - offset
+        # long axis is 3x the speed along the direction, short axis is 0.5x the speed across it
+        along = self.direction[:n] * (self.speed[:n, None] * 3)
+        across = self.direction[:n, ::-1] * (self.speed[:n, None] * 0.5) * (-1, 1)
+        points = np.empty((n, 4, 2))
+        points[:, 0] = pos + along
+        points[:, 1] = pos + across
+        points[:, 2] = pos - along
+        points[:, 3] = pos - across
+        return points
 
     def render(self, surf, offset=(0, 0)):
-        render_points = [
-            (self.pos[0] + math.cos(self.angle) * self.speed * 3 - offset[0], self.pos[1] + math.sin(self.angle) * self.speed * 3 - offset[1]),
-            (self.pos[0] + math.cos(self.angle + math.pi * .5) * self.speed * 0.5 - offset[0], self.pos[1] + math.sin(self.angle + math.pi * .5) * self.speed * 0.5 - offset[1]),
-            (self.pos[0] + math.cos(self.angle + math.pi) * self.speed * 3 - offset[0], self.pos[1] + math.sin(self.angle + math.pi) * self.speed * 3 - offset[1]),
-            (self.pos[0] + math.cos(self.angle - math.pi * .5) * self.speed * 0.5 - offset[0], self.pos[1] + math.sin(self.angle - math.pi * .5) * self.speed * 0.5 - offset[1]),
-        ]
-
-        pygame.draw.polygon(surf, (255, 255, 255), render_points)
+        if not self.count:
+            return
+        # pygame has no batched polygon call, so this is one draw call per spark with all the math done up front
+        draw_polygon = pygame.draw.polygon
+        for points in self.polygons(offset).tolist():
+            draw_polygon(surf, (255, 255, 255), points)
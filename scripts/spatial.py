@@ -0,0 +1,130 @@
+import math
+
+
+"""
+    Uniform grid used to find things by area without looping over all of them.
+    Every item is stored with a rect (x, y, w, h) in every cell that rect touches,
+    and is referred to by the integer handle insert() returns.
+"""
+class SpatialGrid:
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        # (cx, cy) -> set of handles
+        self.cells = {}
+        # handle -> [item, rect], dicts keep insertion order so iteration matches the order items were added
+        self.items = {}
+        self.next_handle = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def __iter__(self):
+        for entry in self.items.values():
+            yield entry[0]
+
+    def __contains__(self, handle):
+        return handle in self.items
+
+    # returns the range of cells a rect covers as (x1, y1, x2, y2), inclusive (rects can have fractional positions)
+    def cell_range(self, rect):
+        return (int(rect[0] // self.cell_size), int(rect[1] // self.cell_size),
+                math.ceil((rect[0] + max(rect[2], 1)) / self.cell_size) - 1, math.ceil((rect[1] + max(rect[3], 1)) / self.cell_size) - 1)
+
+    def link(self, handle, rect):
+        x1, y1, x2, y2 = self.cell_range(rect)
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                if (cx, cy) not in self.cells:
+                    self.cells[(cx, cy)] = set()
+                self.cells[(cx, cy)].add(handle)
+
+    def unlink(self, handle, rect):
+        x1, y1, x2, y2 = self.cell_range(rect)
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                cell = self.cells[(cx, cy)]
+                cell.discard(handle)
+                if not cell:
+                    del self.cells[(cx, cy)]
+
+    def insert(self, item, rect):
+        handle = self.next_handle
+        self.next_handle += 1
+        self.items[handle] = [item, tuple(rect)]
+        self.link(handle, rect)
+        return handle
+
+    # removing only touches the cells the item covers, so it doesn't depend on how many items there are
+    def remove(self, handle):
+        item, rect = self.items.pop(handle)
+        self.unlink(handle, rect)
+        return item
+
+    # updates the rect of an item, the cells are only relinked if it moved into different ones
+    def move(self, handle, rect):
+        entry = self.items[handle]
+        rect = tuple(rect)
+        if self.cell_range(rect) != self.cell_range(entry[1]):
+            self.unlink(handle, entry[1])
+            self.link(handle, rect)
+        entry[1] = rect
+
+    def clear(self):
+        self.cells = {}
+        self.items = {}
+
+    def rect(self, handle):
+        return self.items[handle][1]
+
+    """
+        returns the handles of all items whose rect overlaps the given rect, in insertion order
+    """
+    def query_rect(self, rect):
+        found = set()
+        x1, y1, x2, y2 = self.cell_range(rect)
+        for cx in range(x1, x2 + 1):
+            for cy in range(y1, y2 + 1):
+                if (cx, cy) in self.cells:
+                    found.update(self.cells[(cx, cy)])
+        matches = []
+        for handle in sorted(found):
+            other = self.items[handle][1]
+            if (other[0] < rect[0] + rect[2] and rect[0] < other[0] + other[2]
+                    and other[1] < rect[1] + rect[3] and rect[1] < other[1] + other[3]):
+                matches.append(handle)
+        return matches
+
+    """
+        returns the handles of all items whose rect contains the given point, in insertion order
+    """
+    def query_point(self, pos):
+        cell = self.cells.get((int(pos[0] // self.cell_size), int(pos[1] // self.cell_size)))
+        if not cell:
+            return []
+        matches = []
+        for handle in sorted(cell):
+            rect = self.items[handle][1]
+            if rect[0] <= pos[0] < rect[0] + rect[2] and rect[1] <= pos[1] < rect[1] + rect[3]:
+                matches.append(handle)
+        return matches
+
+    """
+        returns the handles of all items whose rect comes within radius of a point, in insertion order
+    """
+    def query_radius(self, pos, radius):
+        matches = []
+        for handle in self.query_rect((pos[0] - radius, pos[1] - radius, radius * 2, radius * 2)):
+            rect = self.items[handle][1]
+            # distance from the point to the closest point of the rect
+            dx = max(rect[0] - pos[0], 0, pos[0] - rect[0] - rect[2])
+            dy = max(rect[1] - pos[1], 0, pos[1] - rect[1] - rect[3])
+            if dx * dx + dy * dy <= radius * radius:
+                matches.append(handle)
+        return matches
+
+    def get(self, handle):
+        return self.items[handle][0]
+
+    # returns a list of every handle, safe to remove items while looping over it
+    def handles(self):
+        return list(self.items)
@@ -0,0 +1,248 @@
+"""
+    Region streaming for maps too big to load at once.
+
+    A region directory holds one binary map file (see mapfile.py) per square region of
+    REGION_CHUNKS x REGION_CHUNKS chunks plus an index.json listing the regions and the
+    spawners, which are taken out of the regions since they only mark where entities start.
+    RegionStreamer keeps the regions around the camera loaded into a normal Tilemap, so
+    rendering and physics queries work the same as on a fully loaded map.
+
+    Split a map into regions with:  python -m scripts.streaming map.json map_regions
+"""
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.chunk import CHUNK_SIZE
+from scripts.mapfile import CHUNK_RECORD_SIZE, OFFGRID_RECORD, build_chunks, encode_map, read_map_file
+
+REGION_VERSION = 1
+# regions are REGION_CHUNKS x REGION_CHUNKS chunks, 128 x 128 tiles with 16 tile chunks
+REGION_CHUNKS = 8
+# offgrid tile types that are written to the index instead of the regions
+SPAWNER_TYPES = {'spawners'}
+# extra distance around the view, in tiles, whose regions are loaded ahead of time
+LOAD_MARGIN = 32
+# tile data kept loaded before regions away from the camera are dropped, in bytes
+STREAM_BUDGET = 8 * 1024 * 1024
+# finished regions merged into the tilemap per update, a region takes about a millisecond to merge
+MERGES_PER_UPDATE = 1
+
+
+def region_file(directory, key):
+    return os.path.join(directory, '%d_%d.tmap' % key)
+
+
+# returns the region a chunk belongs to
+def chunk_region(chunk_key, region_chunks=REGION_CHUNKS):
+    return (chunk_key[0] // region_chunks, chunk_key[1] // region_chunks)
+
+
+"""
+    writes a loaded tilemap to directory as region files and an index,
+    returns the number of regions written
+"""
+def write_regions(tilemap, directory, region_chunks=REGION_CHUNKS):
+    os.makedirs(directory, exist_ok=True)
+    regions = {}
+    for key in sorted(tilemap.chunks):
+        regions.setdefault(chunk_region(key, region_chunks), ([], []))[0].append(tilemap.chunks[key])
+
+    spawners = []
+    region_px = region_chunks * CHUNK_SIZE * tilemap.tile_size
+    for tile in tilemap.offgrid_tiles:
+        if tile['type'] in SPAWNER_TYPES:
+            spawners.append(tile)
+        else:
+            key = (int(tile['pos'][0] // region_px), int(tile['pos'][1] // region_px))
+            regions.setdefault(key, ([], []))[1].append(tile)
+
+    for key, (chunks, offgrid) in regions.items():
+        f = open(region_file(directory, key), 'wb')
+        f.write(encode_map(tilemap, chunks, offgrid))
+        f.close()
+
+    f = open(os.path.join(directory, 'index.json'), 'w')
+    json.dump({'version': REGION_VERSION, 'tile_size': tilemap.tile_size, 'region_chunks': region_chunks,
+               'regions': sorted(regions), 'spawners': spawners}, f)
+    f.close()
+    return len(regions)
+
+
+"""
+    A region that has been read from disk, or is still being read on the loading thread.
+    handles are the offgrid_tiles handles of its offgrid tiles once it is merged.
+"""
+class Region:
+    def __init__(self, key, future):
+        self.key = key
+        self.future = future
+        self.merged = False
+        # the file couldn't be read, the region is merged as empty
+        self.failed = False
+        self.chunk_keys = []
+        self.handles = []
+        self.bytes = 0
+
+
+"""
+    Loads the regions of a region directory into a tilemap as the camera moves.
+    Files are read and parsed on a loading thread and merged into the tilemap a few at a time
+    from update(), so the frame never waits on the disk. Regions outside the view and its margin
+    are dropped, farthest first, while the loaded tile data is over the budget.
+    update() does at most one region's worth of merging or dropping, so a frame is never held up for long.
+    Edits to loaded tiles are not written back, streamed maps are read only.
+"""
+class RegionStreamer:
+    def __init__(self, tilemap, directory, budget=STREAM_BUDGET, margin=LOAD_MARGIN):
+        self.tilemap = tilemap
+        self.directory = directory
+        self.budget = budget
+        self.margin = margin
+
+        f = open(os.path.join(directory, 'index.json'), 'r')
+        index = json.load(f)
+        f.close()
+        if index['version'] != REGION_VERSION:
+            raise ValueError('%s has region version %d, only version %d is supported' % (directory, index['version'], REGION_VERSION))
+        self.region_chunks = index['region_chunks']
+        # regions that exist on disk, empty ones aren't written
+        self.available = set(tuple(key) for key in index['regions'])
+        self.spawners = index['spawners']
+
+        tilemap.tile_size = index['tile_size']
+        tilemap.chunks = {}
+        tilemap.chunk_surfaces.clear()
+        tilemap.offgrid_tiles.clear()
+
+        self.region_px = self.region_chunks * CHUNK_SIZE * tilemap.tile_size
+        # (rx, ry) -> Region, both loading and loaded
+        self.regions = {}
+        self.loaded_bytes = 0
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='regions')
+
+    # returns the keys of the existing regions that overlap a rect given in pixels
+    def regions_in(self, rect):
+        keys = []
+        for rx in range(int(rect[0] // self.region_px), int((rect[0] + rect[2]) // self.region_px) + 1):
+            for ry in range(int(rect[1] // self.region_px), int((rect[1] + rect[3]) // self.region_px) + 1):
+                if (rx, ry) in self.available:
+                    keys.append((rx, ry))
+        return keys
+
+    """
+        true once every region within a tile of a pixel position is merged, which covers
+        the neighbouring tiles solid_check and physics_rects_around look at
+    """
+    def is_loaded(self, pos):
+        size = self.tilemap.tile_size
+        for key in self.regions_in((pos[0] - size, pos[1] - size, size * 2, size * 2)):
+            if key not in self.regions or not self.regions[key].merged:
+                return False
+        return True
+
+    def request(self, key):
+        if key not in self.regions:
+            self.regions[key] = Region(key, self.pool.submit(read_map_file, region_file(self.directory, key)))
+
+    """
+        adds a region that finished reading to the tilemap. A region whose file is missing or damaged
+        (it can fail in any of the ways parsing it can) is reported and counted as merged with no tiles,
+        so its area stays empty instead of the error stopping the game
+    """
+    def merge(self, region):
+        try:
+            tile_size, names, records, offgrid = region.future.result()
+            chunks = build_chunks(self.tilemap, names, records)
+        except Exception as error:
+            print('could not load region %s: %s' % (region_file(self.directory, region.key), error), file=sys.stderr)
+            region.future = None
+            region.merged = True
+            region.failed = True
+            return
+        self.tilemap.chunks.update(chunks)
+        for key in chunks:
+            self.tilemap.invalidate_chunk(key)
+        region.chunk_keys = list(chunks)
+        region.handles = [self.tilemap.add_offgrid(tile) for tile in offgrid]
+        region.bytes = len(records) * CHUNK_RECORD_SIZE + len(offgrid) * OFFGRID_RECORD.size
+        region.future = None
+        region.merged = True
+        self.loaded_bytes += region.bytes
+
+    def evict(self, region):
+        for key in region.chunk_keys:
+            self.tilemap.chunks.pop(key, None)
+            self.tilemap.invalidate_chunk(key)
+        for handle in region.handles:
+            self.tilemap.remove_offgrid(handle)
+        self.loaded_bytes -= region.bytes
+        del self.regions[region.key]
+
+    """
+        loads the regions overlapping a rect right away, waiting on the disk,
+        used when a level starts so the ground under the player is there on the first frame
+    """
+    def require(self, rect):
+        for key in self.regions_in(rect):
+            self.request(key)
+            if not self.regions[key].merged:
+                self.merge(self.regions[key])
+
+    """
+        call once per step with the camera view in pixels (x, y, width, height),
+        queues regions coming into range, merges finished ones and drops far ones when over budget
+    """
+    def update(self, view):
+        wanted = self.regions_in((view[0] - self.margin * self.tilemap.tile_size, view[1] - self.margin * self.tilemap.tile_size,
+                                  view[2] + self.margin * self.tilemap.tile_size * 2, view[3] + self.margin * self.tilemap.tile_size * 2))
+        # regions under the view itself are merged before the ones in the margin
+        visible = set(self.regions_in(view))
+        wanted.sort(key=lambda key: key not in visible)
+        for key in wanted:
+            self.request(key)
+
+        # regions that went out of range before they finished loading are forgotten
+        for region in list(self.regions.values()):
+            if not region.merged and region.key not in wanted and region.future.done():
+                del self.regions[region.key]
+
+        merges = 0
+        for key in wanted:
+            region = self.regions[key]
+            if not region.merged and region.future.done() and merges < MERGES_PER_UPDATE:
+                self.merge(region)
+                merges += 1
+
+        # dropping a region costs about as much as merging one, so it waits for an update without a merge
+        # and one goes per update, the budget can be over by a region for a few frames
+        if self.loaded_bytes > self.budget and not merges:
+            center = ((view[0] + view[2] / 2) / self.region_px, (view[1] + view[3] / 2) / self.region_px)
+            wanted = set(wanted)
+            far = [region for region in self.regions.values() if region.merged and region.key not in wanted]
+            if far:
+                self.evict(max(far, key=lambda region: (region.key[0] + 0.5 - center[0]) ** 2 + (region.key[1] + 0.5 - center[1]) ** 2))
+
+    def loaded_count(self):
+        return sum(1 for region in self.regions.values() if region.merged)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main(argv=None):
+    from scripts.tilemap import Tilemap
+
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 2:
+        print('usage: python -m scripts.streaming MAP DIRECTORY')
+        return 1
+    tilemap = Tilemap(None)
+    tilemap.load(args[0])
+    print('wrote %d regions to %s' % (write_regions(tilemap, args[1]), args[1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,70 @@
+from collections import OrderedDict
+
+import pygame
+
+# default memory budget of the shared cache, in bytes of pixel data
+TRANSFORM_CACHE_BYTES = 16 * 1024 * 1024
+
+
+"""
+    Cache of transformed surfaces (flipped, scaled, alpha changed) keyed by the source surface
+    and the transform parameters. The least recently used entries are dropped once the pixel
+    data of everything cached goes over max_bytes.
+    Cached surfaces are shared, so callers must only blit them and never draw on them.
+"""
+class TransformCache:
+    def __init__(self, max_bytes=TRANSFORM_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self):
+        return {'entries': len(self.entries), 'bytes': self.bytes, 'hits': self.hits, 'misses': self.misses}
+
+    """
+        returns the cached result for key, calling make() to create it on a miss
+    """
+    def get(self, key, make):
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+        self.misses += 1
+        surf = make()
+        self.entries[key] = surf
+        self.bytes += surf.get_width() * surf.get_height() * surf.get_bytesize()
+        while self.bytes > self.max_bytes and len(self.entries) > 1:
+            old = self.entries.popitem(last=False)[1]
+            self.bytes -= old.get_width() * old.get_height() * old.get_bytesize()
+        return surf
+
+    def flip(self, surf, flip_x, flip_y=False):
+        if not flip_x and not flip_y:
+            return surf
+        return self.get((surf, 'flip', bool(flip_x), bool(flip_y)), lambda: pygame.transform.flip(surf, flip_x, flip_y))
+
+    def scale(self, surf, size):
+        size = (int(size[0]), int(size[1]))
+        return self.get((surf, 'scale', size), lambda: pygame.transform.scale(surf, size))
+
+    # returns a copy of surf drawn with the given alpha (0 -> 255)
+    def alpha(self, surf, alpha):
+        def make():
+            copy = surf.copy()
+            copy.set_alpha(alpha)
+            return copy
+        return self.get((surf, 'alpha', alpha), make)
+
+
+# shared by everything that transforms the same images every frame
+transform_cache = TransformCache()
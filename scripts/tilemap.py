@@ -1,5 +1,12 @@
 import pygame
 import json
+import numpy as np
+from collections import OrderedDict
+
+from scripts.chunk import TileChunk, chunk_index, EMPTY, CHUNK_SIZE, CHUNK_SHIFT, CHUNK_MASK
+from scripts.spatial import SpatialGrid
+from scripts.outline import make_silhouette
+from scripts.mapfile import MAP_EXTENSION, read_map, write_map
 
 # 3:18:53
 # keep in mind tuples are not key value pairs, they are much more similar to lists
@@ -16,22 +23,159 @@ AUTOTILE_MAP = {
     tuple(sorted([(1, 0), (0, 1), (-1, 0), (0, -1)])): 8
 }
 
+# bit of each side in an autotile neighbour mask
+AUTOTILE_BITS = {(1, 0): 1, (-1, 0): 2, (0, -1): 4, (0, 1): 8}
+# neighbour mask -> variant, AUTOTILE_NONE where AUTOTILE_MAP has no entry (the variant is left alone)
+AUTOTILE_NONE = 255
+AUTOTILE_LUT = bytearray([AUTOTILE_NONE]) * 16
+for neighbors, variant in AUTOTILE_MAP.items():
+    AUTOTILE_LUT[sum(AUTOTILE_BITS[shift] for shift in neighbors)] = variant
+
 NEIGHBOR_OFFSETS = [(-1, 0), (-1, -1), (0, -1), (1, -1), (1, 0), (0, 0), (-1, 1), (0, 1), (1, 1)]
+# the same offsets with how far apart the cells are in a chunk's arrays
+NEIGHBOR_STEPS = [(x, y, (y << CHUNK_SHIFT) + x) for x, y in NEIGHBOR_OFFSETS]
 PHYSICS_TILES = {'grass', 'stone'}
 AUTOTILE_TYPES = {'grass', 'stone'}
+# max amount of pre-rendered chunk surfaces kept around, least recently drawn ones are dropped first
+CHUNK_CACHE_SIZE = 64
+# size in pixels of the buckets offgrid tiles are sorted into
+OFFGRID_CELL_SIZE = 64
 
 
 class Tilemap:
     def __init__(self, game, tile_size=16):
         self.game = game
         self.tile_size = tile_size
-        self.tilemap = {}
-        self.offgrid_tiles = []
+        # grid tiles live in chunks keyed by integer (cx, cy) chunk coordinates
+        self.chunks = {}
+        # tile types are stored in the chunks as small integer ids, index 0 is reserved for empty cells
+        self.type_names = [None]
+        self.type_ids = {}
+        # solid_ids[type_id] is 1 if that type is one of the PHYSICS_TILES
+        self.solid_ids = bytearray(1)
+        # solid_ids padded to 256 entries, chunk types are translated through it into solid bitmaps
+        self.solid_table = bytes(256)
+        # autotile_ids[type_id] is 1 if that type is one of the AUTOTILE_TYPES
+        self.autotile_ids = bytearray(1)
+        # (cx, cy) -> [surface with every tile of that chunk already drawn on it, its silhouette or None],
+        # in least recently used order
+        self.chunk_surfaces = OrderedDict()
+        # offgrid tiles are bucketed by area so rendering and mouse picking only look at nearby ones
+        self.offgrid_tiles = SpatialGrid(OFFGRID_CELL_SIZE)
+
+    # returns the integer id of a tile type, registering it if it hasn't been seen yet
+    def type_id(self, tile_type):
+        if tile_type not in self.type_ids:
+            self.type_ids[tile_type] = len(self.type_names)
+            self.type_names.append(tile_type)
+            self.solid_ids.append(1 if tile_type in PHYSICS_TILES else 0)
+            self.solid_table = bytes(self.solid_ids) + bytes(256 - len(self.solid_ids))
+            self.autotile_ids.append(1 if tile_type in AUTOTILE_TYPES else 0)
+        return self.type_ids[tile_type]
+
+    # returns true if the cell changed
+    def set_tile(self, pos, tile_type, variant):
+        key, index = chunk_index(int(pos[0]), int(pos[1]))
+        if key not in self.chunks:
+            self.chunks[key] = TileChunk(key)
+        chunk = self.chunks[key]
+        type_id = self.type_id(tile_type)
+        # the editor keeps placing the same tile while the mouse is held, that shouldn't re-render the chunk
+        if chunk.types[index] != type_id or chunk.variants[index] != variant:
+            chunk.set(index, type_id, variant)
+            self.invalidate_chunk(key)
+            return True
+        return False
 
-        # for i in range(10):
-        #     # creates a horizontal line of grass from x3 to x12
-        #     self.tilemap[str(3 + i) + ';10'] = {'type': 'grass', 'variant': 1, 'pos': (3 + i, 10)}
-        #     self.tilemap['10;' + str(5 + i)] = {'type': 'stone', 'variant': 1, 'pos': (10, 5 + i)}
+    # returns true if a tile was removed
+    def remove_tile(self, pos):
+        key, index = chunk_index(int(pos[0]), int(pos[1]))
+        chunk = self.chunks.get(key)
+        if chunk is None or chunk.types[index] == EMPTY:
+            return False
+        chunk.clear(index)
+        if not chunk.count:
+            del self.chunks[key]
+        self.invalidate_chunk(key)
+        return True
+
+    # drops the cached surface of a chunk so it gets rendered again the next time it is on screen
+    def invalidate_chunk(self, key):
+        self.chunk_surfaces.pop(key, None)
+
+    """
+    returns the pre-rendered surface of a chunk, rendering it first if it isn't cached
+    """
+    def chunk_surface(self, key):
+        if key in self.chunk_surfaces:
+            self.chunk_surfaces.move_to_end(key)
+            return self.chunk_surfaces[key][0]
+
+        chunk = self.chunks[key]
+        base_x = key[0] << CHUNK_SHIFT
+        base_y = key[1] << CHUNK_SHIFT
+        blits = []
+        # tiles can be bigger than a grid cell (large_decor), so the surface grows to fit them
+        width = height = CHUNK_SIZE * self.tile_size
+        for x, y, type_id, variant in chunk.cells():
+            img = self.game.assets[self.type_names[type_id]][variant]
+            dest = ((x - base_x) * self.tile_size, (y - base_y) * self.tile_size)
+            width = max(width, dest[0] + img.get_width())
+            height = max(height, dest[1] + img.get_height())
+            blits.append((img, dest))
+
+        surf = pygame.Surface((width, height), pygame.SRCALPHA)
+        surf.blits(blits, doreturn=False)
+        self.chunk_surfaces[key] = [surf, None]
+        if len(self.chunk_surfaces) > CHUNK_CACHE_SIZE:
+            self.chunk_surfaces.popitem(last=False)
+        return surf
+
+    # returns the outline silhouette of a chunk, made from its cached surface the first time it's needed
+    def chunk_silhouette(self, key):
+        surf = self.chunk_surface(key)
+        entry = self.chunk_surfaces[key]
+        if entry[1] is None:
+            entry[1] = make_silhouette(surf)
+        return entry[1]
+
+    # returns the pixel rect an offgrid tile covers
+    def offgrid_rect(self, tile):
+        size = (self.tile_size, self.tile_size)
+        # the game doesn't load every tile set (spawners), those fall back to one grid cell
+        if self.game is not None and tile['type'] in self.game.assets:
+            size = self.game.assets[tile['type']][tile['variant']].get_size()
+        return (tile['pos'][0], tile['pos'][1], size[0], size[1])
+
+    # adds an offgrid tile and returns its handle in offgrid_tiles
+    def add_offgrid(self, tile):
+        return self.offgrid_tiles.insert(tile, self.offgrid_rect(tile))
+
+    def remove_offgrid(self, handle):
+        return self.offgrid_tiles.remove(handle)
+
+    # returns the handles of the offgrid tiles under a point given in pixels
+    def offgrid_at(self, pos):
+        return self.offgrid_tiles.query_point(pos)
+
+    # returns the tile at a grid position as a dict, or None if the cell is empty
+    def get_tile(self, pos):
+        key, index = chunk_index(int(pos[0]), int(pos[1]))
+        chunk = self.chunks.get(key)
+        if chunk is None or chunk.types[index] == EMPTY:
+            return None
+        return {'type': self.type_names[chunk.types[index]], 'variant': chunk.variants[index], 'pos': [int(pos[0]), int(pos[1])]}
+
+    """
+    yields every grid tile as a dict in the same shape map.json uses
+    """
+    def tiles(self):
+        for chunk in list(self.chunks.values()):
+            for x, y, type_id, variant in chunk.cells():
+                yield {'type': self.type_names[type_id], 'variant': variant, 'pos': [x, y]}
+
+    def tile_count(self):
+        return sum(chunk.count for chunk in self.chunks.values())
 
     """
     The extract function returns instances of a tile, defined by an id pair of type and variant
@@ -40,92 +184,289 @@ class Tilemap:
     """
     def extract(self, id_pairs, keep=False):
         matches = []
-        for tile in self.offgrid_tiles.copy():
+        for handle in self.offgrid_tiles.handles():
+            tile = self.offgrid_tiles.get(handle)
             if (tile['type'], tile['variant']) in id_pairs:
                 matches.append(tile.copy())
                 if not keep:
-                    self.offgrid_tiles.remove(tile)
-        for location in self.tilemap:
-            tile = self.tilemap[location]
+                    self.remove_offgrid(handle)
+        for tile in self.tiles():
             if (tile['type'], tile['variant']) in id_pairs:
-                matches.append(tile.copy())
-                # -1 refers to the last element, which is the element that was just appended
-                matches[-1]['pos'] = matches[-1]['pos'].copy()
-                matches[-1]['pos'][0] *= self.tile_size
-                matches[-1]['pos'][1] *= self.tile_size
-
+                matches.append(tile)
                 if not keep:
-                    del self.tilemap[location]
+                    self.remove_tile(tile['pos'])
+                # tiles() builds fresh dicts so the position can be converted to pixels in place
+                tile['pos'] = [tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size]
 
         return matches
 
 
     """
-    returns the tiles around a given position
-        pos: 
+    returns the tiles in the 3x3 grid cells around a position given in pixels, as (x, y, type, variant)
+    tuples in grid cells, read straight from the chunks (get_tile builds the dict form when it's needed)
     """
     def tiles_around(self, pos):
-        # // is integer division
         tiles = []
-        tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
-        for offset in NEIGHBOR_OFFSETS:
-            check_loc = str(tile_loc[0] + offset[0]) + ';' + str(tile_loc[1] + offset[1])
-            if check_loc in self.tilemap:
-                tiles.append(self.tilemap[check_loc])
+        tile_x = int(pos[0] // self.tile_size)
+        tile_y = int(pos[1] // self.tile_size)
+        names = self.type_names
+        local_x = tile_x & CHUNK_MASK
+        local_y = tile_y & CHUNK_MASK
+        if 0 < local_x < CHUNK_MASK and 0 < local_y < CHUNK_MASK:
+            # all 9 cells are in one chunk, so they are fixed steps away from the middle cell
+            chunk = self.chunks.get((tile_x >> CHUNK_SHIFT, tile_y >> CHUNK_SHIFT))
+            if chunk is None:
+                return tiles
+            types = chunk.types
+            middle = (local_y << CHUNK_SHIFT) | local_x
+            for offset_x, offset_y, step in NEIGHBOR_STEPS:
+                type_id = types[middle + step]
+                if type_id:
+                    tiles.append((tile_x + offset_x, tile_y + offset_y, names[type_id], chunk.variants[middle + step]))
+            return tiles
+        for offset_x, offset_y in NEIGHBOR_OFFSETS:
+            key, index = chunk_index(tile_x + offset_x, tile_y + offset_y)
+            chunk = self.chunks.get(key)
+            if chunk is not None and chunk.types[index]:
+                tiles.append((tile_x + offset_x, tile_y + offset_y, names[chunk.types[index]], chunk.variants[index]))
         return tiles
 
+    # paths ending in MAP_EXTENSION use the binary format in mapfile.py, anything else is written as json
     def save(self, path):
+        if path.endswith(MAP_EXTENSION):
+            write_map(self, path)
+            return
+        tilemap = {}
+        for tile in self.tiles():
+            tilemap[str(tile['pos'][0]) + ';' + str(tile['pos'][1])] = tile
         f = open(path, 'w')
-        json.dump({'tilemap': self.tilemap, 'tile_size': self.tile_size, 'offgrid': self.offgrid_tiles}, f)
+        json.dump({'tilemap': tilemap, 'tile_size': self.tile_size, 'offgrid': list(self.offgrid_tiles)}, f)
         f.close()
 
     def load(self, path):
+        if path.endswith(MAP_EXTENSION):
+            read_map(self, path)
+            return
         f = open(path, 'r')
         map_data = json.load(f)
         f.close()
 
-        self.tilemap = map_data['tilemap']
+        self.chunks = {}
+        self.chunk_surfaces.clear()
+        for tile in map_data['tilemap'].values():
+            self.set_tile(tile['pos'], tile['type'], tile['variant'])
         self.tile_size = map_data['tile_size']
-        self.offgrid_tiles = map_data['offgrid']
+        self.offgrid_tiles.clear()
+        for tile in map_data['offgrid']:
+            self.add_offgrid(tile)
+
+    # returns the type id at a grid position (0 if empty)
+    def type_at(self, x, y):
+        key, index = chunk_index(x, y)
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            return EMPTY
+        return chunk.types[index]
 
     # checks if a tile at a given location is solid
+    # (the lookup is index math on the chunk, the dict is only built for a solid tile)
     def solid_check(self, pos):
-        tile_loc = str(int(pos[0] // self.tile_size)) + ';' + str(int(pos[1] // self.tile_size))
-        # checks if tile exists
-        if tile_loc in self.tilemap:
-            # checks if tile is a 'PHYSICS_TILE' defined as list above the class
-            if self.tilemap[tile_loc]['type'] in PHYSICS_TILES:
-                return self.tilemap[tile_loc]
+        x = int(pos[0] // self.tile_size)
+        y = int(pos[1] // self.tile_size)
+        chunk = self.chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+        if chunk is None:
+            return None
+        index = ((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)
+        # checks if the tile exists and is a 'PHYSICS_TILE' defined as list above the class
+        if self.solid_ids[chunk.types[index]]:
+            return {'type': self.type_names[chunk.types[index]], 'variant': chunk.variants[index], 'pos': [x, y]}
 
+    # returns a rect for every solid tile in the 3x3 tiles around a position
     def physics_rects_around(self, pos):
         rects = []
-        for tile in self.tiles_around(pos):
-            if tile['type'] in PHYSICS_TILES:
-                rects.append(pygame.Rect(tile['pos'][0] * self.tile_size, tile['pos'][1] * self.tile_size, self.tile_size, self.tile_size))
+        tile_loc = (int(pos[0] // self.tile_size), int(pos[1] // self.tile_size))
+        for offset in NEIGHBOR_OFFSETS:
+            x = tile_loc[0] + offset[0]
+            y = tile_loc[1] + offset[1]
+            if self.solid_at(x, y):
+                rects.append(pygame.Rect(x * self.tile_size, y * self.tile_size, self.tile_size, self.tile_size))
         return rects
 
+    # returns the solid bitmap of a chunk, one byte per cell that is 1 for PHYSICS_TILES
+    def chunk_solid(self, chunk):
+        if chunk.solid is None:
+            chunk.solid = chunk.types.translate(self.solid_table)
+        return chunk.solid
+
+    # 1 if the tile at a grid position is solid, 0 otherwise
+    def solid_at(self, x, y):
+        chunk = self.chunks.get((x >> CHUNK_SHIFT, y >> CHUNK_SHIFT))
+        if chunk is None:
+            return 0
+        solid = chunk.solid if chunk.solid is not None else self.chunk_solid(chunk)
+        return solid[((y & CHUNK_MASK) << CHUNK_SHIFT) | (x & CHUNK_MASK)]
+
+    # true if any tile in column c between rows r1 and r2 (inclusive) is solid
+    def column_solid(self, c, r1, r2):
+        for r in range(r1, r2 + 1):
+            if self.solid_at(c, r):
+                return True
+        return False
+
+    # true if any tile in row r between columns c1 and c2 (inclusive) is solid
+    def row_solid(self, r, c1, c2):
+        for c in range(c1, c2 + 1):
+            if self.solid_at(c, r):
+                return True
+        return False
+
+    """
+    moves a w x h box at (x, y) by dx and stops it against the first solid tile it overlaps or passes
+    through on the way, so it can't tunnel through walls however fast it goes
+        returns (new x, 1 if it was stopped moving right, -1 if stopped moving left, else 0)
+    like the pygame.Rect based collisions this replaced, the box covers (int(x), int(y), w, h)
+    and x snaps to a whole pixel when it ends up touching a solid tile
+    """
+    def sweep_x(self, x, y, w, h, dx):
+        size = self.tile_size
+        start = int(x)
+        end = int(x + dx)
+        r1 = int(y) // size
+        r2 = (int(y) + h - 1) // size
+        if dx > 0:
+            # tiles the box ends up in plus any it passed over between its old right edge and its new position
+            for c in range(min(end // size, (start + w - 1) // size + 1), (end + w - 1) // size + 1):
+                if self.column_solid(c, r1, r2):
+                    return c * size - w, 1
+        elif dx < 0:
+            for c in range(max((end + w - 1) // size, start // size - 1), end // size - 1, -1):
+                if self.column_solid(c, r1, r2):
+                    return (c + 1) * size, -1
+        else:
+            for c in range(end // size, (end + w - 1) // size + 1):
+                if self.column_solid(c, r1, r2):
+                    return end, 0
+        return x + dx, 0
+
+    """
+    the same as sweep_x along y
+        returns (new y, 1 if it was stopped moving down, -1 if stopped moving up, else 0)
+    """
+    def sweep_y(self, x, y, w, h, dy):
+        size = self.tile_size
+        start = int(y)
+        end = int(y + dy)
+        c1 = int(x) // size
+        c2 = (int(x) + w - 1) // size
+        if dy > 0:
+            for r in range(min(end // size, (start + h - 1) // size + 1), (end + h - 1) // size + 1):
+                if self.row_solid(r, c1, c2):
+                    return r * size - h, 1
+        elif dy < 0:
+            for r in range(max((end + h - 1) // size, start // size - 1), end // size - 1, -1):
+                if self.row_solid(r, c1, c2):
+                    return (r + 1) * size, -1
+        else:
+            for r in range(end // size, (end + h - 1) // size + 1):
+                if self.row_solid(r, c1, c2):
+                    return end, 0
+        return y + dy, 0
+
+    """
+    picks the variant of every autotiled tile from which of its 4 neighbours have the same type,
+    every chunk is done at once with numpy: the chunks are stacked and each one is padded with
+    the edge cells of the chunks around it
+    """
     def autotile(self):
-        for location in self.tilemap:
-            tile = self.tilemap[location]
-            neighbors = set()
-            for shift in [(1, 0), (-1, 0), (0, -1), (0, 1)]:
-                check_loc = str(tile['pos'][0] + shift[0]) + ';' + str(tile['pos'][1] + shift[1])
-                if check_loc in self.tilemap:
-                    if self.tilemap[check_loc]['type'] == tile['type']:  # if adjacent tile is the same type
-                        neighbors.add(shift)
-            neighbors = tuple(sorted(neighbors))
-            if (tile['type'] in AUTOTILE_TYPES) and (neighbors in AUTOTILE_MAP):
-                tile['variant'] = AUTOTILE_MAP[neighbors]
-
-    def render(self, surf, offset=(0, 0)):
-        for tile in self.offgrid_tiles:
-             surf.blit(self.game.assets[tile['type']][tile['variant']], (tile['pos'][0] - offset[0], tile['pos'][1] - offset[1]))
-
-        # for loops lead to rendering of only the textures that are in frame
-        for x in range(offset[0] // self.tile_size, (offset[0] + surf.get_width()) // self.tile_size + 1):
-            for y in range(offset[1] // self.tile_size, (offset[1] + surf.get_height()) // self.tile_size + 1):
-                location = str(x) + ';' + str(y)
-                if location in self.tilemap:
-                    tile = self.tilemap[location]
-                    surf.blit(self.game.assets[tile['type']][tile['variant']], (
-                    tile['pos'][0] * self.tile_size - offset[0], tile['pos'][1] * self.tile_size - offset[1]))
\ No newline at end of file
+        if not self.chunks:
+            return
+        keys = list(self.chunks)
+        count = len(keys)
+        # one extra empty chunk at the end stands in for missing neighbours
+        types = np.zeros((count + 1, CHUNK_SIZE, CHUNK_SIZE), dtype=np.uint8)
+        types[:count] = np.frombuffer(b''.join([self.chunks[key].types for key in keys]), dtype=np.uint8).reshape(count, CHUNK_SIZE, CHUNK_SIZE)
+        variants = np.frombuffer(b''.join([self.chunks[key].variants for key in keys]), dtype=np.uint8).reshape(count, CHUNK_SIZE, CHUNK_SIZE)
+
+        # chunk slot of each chunk's right, left, up and down neighbour, looked up with a sorted array of packed keys
+        positions = np.array(keys, dtype=np.int64)
+        packed = (positions[:, 0] << 32) + positions[:, 1]
+        order = np.argsort(packed)
+        packed_sorted = packed[order]
+        neighbors = np.empty((count, 4), dtype=np.int64)
+        for i, shift in enumerate(AUTOTILE_BITS):
+            wanted = packed + (shift[0] << 32) + shift[1]
+            found = np.minimum(np.searchsorted(packed_sorted, wanted), count - 1)
+            neighbors[:, i] = np.where(packed_sorted[found] == wanted, order[found], count)
+        # rows are y and columns are x, the same order the chunks store cells in
+        padded = np.zeros((count, CHUNK_SIZE + 2, CHUNK_SIZE + 2), dtype=np.uint8)
+        padded[:, 1:-1, 1:-1] = types[:count]
+        padded[:, 1:-1, -1] = types[neighbors[:, 0], :, 0]
+        padded[:, 1:-1, 0] = types[neighbors[:, 1], :, -1]
+        padded[:, 0, 1:-1] = types[neighbors[:, 2], -1, :]
+        padded[:, -1, 1:-1] = types[neighbors[:, 3], 0, :]
+
+        types = types[:count]
+        mask = ((padded[:, 1:-1, 2:] == types).view(np.uint8) * np.uint8(AUTOTILE_BITS[(1, 0)])
+                | (padded[:, 1:-1, :-2] == types).view(np.uint8) * np.uint8(AUTOTILE_BITS[(-1, 0)])
+                | (padded[:, :-2, 1:-1] == types).view(np.uint8) * np.uint8(AUTOTILE_BITS[(0, -1)])
+                | (padded[:, 2:, 1:-1] == types).view(np.uint8) * np.uint8(AUTOTILE_BITS[(0, 1)]))
+        new_variants = np.frombuffer(AUTOTILE_LUT, dtype=np.uint8)[mask]
+
+        # indexed by a whole chunk of type ids at once, so it covers every possible id
+        autotile_ids = np.zeros(256, dtype=bool)
+        autotile_ids[:len(self.autotile_ids)] = np.frombuffer(self.autotile_ids, dtype=np.uint8)
+        changed = autotile_ids[types] & (new_variants != AUTOTILE_NONE) & (new_variants != variants)
+        new_variants = np.where(changed, new_variants, variants)
+        for i in np.flatnonzero(changed.any(axis=(1, 2))):
+            self.chunks[keys[i]].variants[:] = new_variants[i].tobytes()
+            self.invalidate_chunk(keys[i])
+
+    # re-picks the variant of one autotiled tile from its 4 neighbours
+    def autotile_cell(self, x, y):
+        type_id = self.type_at(x, y)
+        if not self.autotile_ids[type_id]:
+            return
+        mask = 0
+        for shift, bit in AUTOTILE_BITS.items():
+            if self.type_at(x + shift[0], y + shift[1]) == type_id:
+                mask |= bit
+        variant = AUTOTILE_LUT[mask]
+        key, index = chunk_index(x, y)
+        chunk = self.chunks[key]
+        if variant != AUTOTILE_NONE and chunk.variants[index] != variant:
+            chunk.variants[index] = variant
+            self.invalidate_chunk(key)
+
+    """
+    autotiles a grid position and its 4 neighbours, the only tiles whose variant
+    can change when that position is placed or removed
+    """
+    def autotile_around(self, pos):
+        x, y = int(pos[0]), int(pos[1])
+        self.autotile_cell(x, y)
+        for shift in AUTOTILE_BITS:
+            self.autotile_cell(x + shift[0], y + shift[1])
+
+    """
+    draws the visible tiles
+        outline: OutlineLayer that gets the silhouette of everything drawn, if given
+    """
+    def render(self, surf, offset=(0, 0), outline=None):
+        # only the offgrid tiles that overlap the view are drawn
+        for handle in self.offgrid_tiles.query_rect((offset[0], offset[1], surf.get_width(), surf.get_height())):
+            tile = self.offgrid_tiles.get(handle)
+            img = self.game.assets[tile['type']][tile['variant']]
+            pos = (tile['pos'][0] - offset[0], tile['pos'][1] - offset[1])
+            surf.blit(img, pos)
+            if outline:
+                outline.add(img, pos)
+
+        # only the chunks that overlap the view are drawn, each one is a single blit of a cached surface
+        chunk_px = CHUNK_SIZE * self.tile_size
+        for cx in range(offset[0] // chunk_px - 1, (offset[0] + surf.get_width()) // chunk_px + 1):
+            for cy in range(offset[1] // chunk_px - 1, (offset[1] + surf.get_height()) // chunk_px + 1):
+                if (cx, cy) in self.chunks:
+                    pos = (cx * chunk_px - offset[0], cy * chunk_px - offset[1])
+                    surf.blit(self.chunk_surface((cx, cy)), pos)
+                    if outline:
+                        outline.add_silhouette(self.chunk_silhouette((cx, cy)), pos)
@@ -0,0 +1,68 @@
+import pygame
+
+# longest a menu sleeps waiting for input, in milliseconds, it still wakes up this often to finish loading assets
+MENU_WAIT_MS = 250
+
+
+"""
+    Blocks until there is input or timeout milliseconds pass, then returns every queued event.
+    Menus wait here instead of polling every frame, so an idle menu barely uses the CPU.
+"""
+def wait_events(timeout=MENU_WAIT_MS):
+    event = pygame.event.wait(timeout)
+    if event.type == pygame.NOEVENT:
+        return []
+    return [event] + pygame.event.get()
+
+
+"""
+    A retained mode screen: everything that never changes (background, title, text) is composited
+    into layer once, and the widgets on top of it (Buttons) are only drawn again when they change.
+    A full redraw happens when the panel is opened, after that a frame where nothing was hovered or
+    clicked draws nothing at all.
+"""
+class Panel:
+    def __init__(self, size):
+        self.layer = pygame.Surface(size)
+        self.widgets = []
+        # the whole panel has to be drawn on the next render
+        self.stale = True
+
+    def add(self, widget):
+        self.widgets.append(widget)
+        return widget
+
+    # copies a surface (a background, the last frame of gameplay) into the layer
+    def capture(self, surface):
+        self.layer.blit(surface, (0, 0))
+
+    # call when the panel is shown, it's drawn in full and the widgets pick up where the mouse is now
+    def open(self):
+        self.stale = True
+        pos = pygame.mouse.get_pos()
+        for widget in self.widgets:
+            widget.hover(pos)
+
+    # returns the widget an event clicked, or None
+    def handle_event(self, event):
+        clicked = None
+        for widget in self.widgets:
+            if widget.handle_event(event) and clicked is None:
+                clicked = widget
+        return clicked
+
+    # draws what changed since the last render to surface and marks it in dirty (a DirtyRects)
+    def render(self, surface, dirty):
+        if self.stale:
+            surface.blit(self.layer, (0, 0))
+            for widget in self.widgets:
+                widget.render(surface)
+            dirty.mark_all()
+            self.stale = False
+            return
+        for widget in self.widgets:
+            if widget.changed:
+                # the layer under the widget is put back first, the highlighted image isn't opaque everywhere
+                surface.blit(self.layer, widget.rect, widget.rect)
+                widget.render(surface)
+                dirty.mark(widget.rect)
@@ -1,8 +1,6 @@
-import os
-
 import pygame
 
-BASE_IMAG_PATH = 'data/images/'
+from scripts.atlas import BASE_IMAG_PATH, load_atlas
 
 # function to return image objects and make black background transparent
 def load_image(path):
@@ -12,37 +10,49 @@ def load_image(path):
 
 # function to load a list of images within a given directory
 # to load multiple tiles at once
+# the images come out of the directory's packed atlas (see scripts/atlas.py) so it's a single file decode
 def load_images(path):
-    images = []
-    # os.listdir = all of the files in a given path
-    for img_name in sorted(os.listdir(BASE_IMAG_PATH + path)):
-        images.append(load_image(path + '/' + img_name))
-    return images
+    return load_atlas(path)
+
+
+"""
+    Counts simulation steps for every animation at once. An entity playing an animation only keeps
+    the tick it started on, how far along it is comes from the one shared tick.
+"""
+class AnimationClock:
+    def __init__(self):
+        self.tick = 0
+
+    # call once per simulation step
+    def advance(self):
+        self.tick += 1
 
 
+animation_clock = AnimationClock()
+
+
+"""
+    An animation clip, shared by everything that plays it and never changed once made.
+    frames holds the image to show on each step of one run through the clip, so looking up the
+    image for a number of steps since the clip started is a single index.
+    Looping clips start over after the last step, others hold their final image.
+"""
 class Animation:
+    __slots__ = ('images', 'loop', 'img_duration', 'frames', 'length')
+
     def __init__(self, images, img_dur=5, loop=True):
         self.images = images
         self.loop = loop
         self.img_duration = img_dur
-        self.done = False
-        self.frame = 0  # frame of the game
-
-    def copy(self):  # returns a reference of the initial animation
-        return Animation(self.images, self.img_duration, self.loop)
-
-    def update(self):
-        if self.loop:
-            # I actually understand ts fuck yea
-            self.frame = (self.frame + 1) % (self.img_duration * len(self.images))
-        else:
-            # replays the final frame infinitely ig
-            self.frame = min((self.frame + 1) % (self.img_duration * len(self.images)), self.img_duration * len(self.images) - 1)
-            if self.frame >= self.img_duration * len(self.images) - 1:
-                self.done = True
-
-    """
-        returns current image of animation
-    """
-    def img(self):
-        return self.images[int(self.frame / self.img_duration)]
+        self.frames = tuple(images[i // img_dur] for i in range(img_dur * len(images)))
+        self.length = len(self.frames)
+
+    # returns the image steps ticks after the clip started
+    def img_at(self, steps):
+        if steps >= self.length:
+            steps = steps % self.length if self.loop else self.length - 1
+        return self.frames[steps]
+
+    # true once a clip that doesn't loop has reached its final image
+    def done_at(self, steps):
+        return not self.loop and steps >= self.length - 1